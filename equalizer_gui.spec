@@ -28,6 +28,7 @@ a = Analysis(
         'numpy',
         'scipy',
         'scipy.signal',
+        'numba',
         'matplotlib',
         'matplotlib.backends.backend_qt5agg',
         'PyQt5',
@@ -6,9 +6,19 @@ This module provides core audio processing functions for implementing
 a parametric equalizer using digital signal processing techniques.
 """
 
+from math import pi, tan
+
 import numpy as np
 from scipy import signal
 
+from filters import (
+    HAVE_NUMBA, INT16_SCALE, PARALLEL_MIN_CHANNELS, SAMPLE_FRACTION_BITS, cascade_biquad_fixed,
+    cascade_biquad_multi, cascade_response, get_cascade_kernel, saturate_to_i16, to_fixed_point
+)
+
+# Fade envelopes by length, shared by all apply_fade calls
+_FADE_CACHE = {}
+
 
 class EqualizerBand:
     """Represents a single equalizer band with frequency, gain, and Q factor."""
@@ -22,62 +32,154 @@ class EqualizerBand:
             gain_db (float): Gain in decibels (-20 to +20 typical range)
             q_factor (float): Quality factor (0.1 to 10, default 1.0)
         """
-        self.frequency = frequency
-        self.gain_db = gain_db
-        self.q_factor = q_factor
+        self._frequency = frequency
+        self._gain_db = gain_db
+        self._q_factor = q_factor
         
-    def get_filter_coefficients(self, sample_rate):
+        # Cached coefficients, recomputed only after a parameter changes
+        self._coeffs = None
+        self._coeffs_rate = None
+        self._coeffs_dirty = True
+        
+        # Gain-independent terms (1 + k^2, b1, k / Q), kept across gain
+        # changes and dropped when the frequency, Q or sample rate changes
+        self._prewarp = None
+        
+    @property
+    def frequency(self):
+        """float: Center frequency in Hz."""
+        return self._frequency
+        
+    @frequency.setter
+    def frequency(self, value):
+        self._frequency = value
+        self._prewarp = None
+        self._coeffs_dirty = True
+        
+    @property
+    def gain_db(self):
+        """float: Gain in decibels."""
+        return self._gain_db
+        
+    @gain_db.setter
+    def gain_db(self, value):
+        self._gain_db = value
+        self._coeffs_dirty = True
+        
+    @property
+    def q_factor(self):
+        """float: Quality factor."""
+        return self._q_factor
+        
+    @q_factor.setter
+    def q_factor(self, value):
+        self._q_factor = value
+        self._prewarp = None
+        self._coeffs_dirty = True
+        
+    def _compute(self, sample_rate):
         """
-        Calculate biquad filter coefficients for this band.
+        Recompute the cached filter coefficients.
         
         Args:
             sample_rate (int): Sample rate in Hz
-            
-        Returns:
-            tuple: (b, a) filter coefficients
         """
         # Convert gain from dB to linear
-        gain_linear = 10 ** (self.gain_db / 20.0)
+        gain_linear = 10 ** (self._gain_db / 20.0)
         
-        # Normalize frequency
-        w0 = 2 * np.pi * self.frequency / sample_rate
-        
-        # Calculate alpha (bandwidth parameter)
-        alpha = np.sin(w0) / (2 * self.q_factor)
-        
-        # Peaking EQ filter coefficients
-        cos_w0 = np.cos(w0)
+        # Prewarped frequency, as used by the state-variable filter form.
+        # With k = tan(w0 / 2), sin(w0) = 2k / (1 + k^2) and
+        # cos(w0) = (1 - k^2) / (1 + k^2), so the cookbook peaking filter
+        # scaled by (1 + k^2) needs this one transcendental only, and
+        # none at all when only the gain changed.
+        if self._prewarp is None or sample_rate != self._coeffs_rate:
+            k = tan(pi * self._frequency / sample_rate)
+            k2 = k * k
+            self._prewarp = (1 + k2, -2 * (1 - k2), k / self._q_factor)
+        k2_1, b1, bandwidth = self._prewarp
         
         # Numerator coefficients (b)
-        b0 = 1 + alpha * gain_linear
-        b1 = -2 * cos_w0
-        b2 = 1 - alpha * gain_linear
+        b0 = k2_1 + bandwidth * gain_linear
+        b2 = k2_1 - bandwidth * gain_linear
         
         # Denominator coefficients (a)
-        a0 = 1 + alpha / gain_linear
-        a1 = -2 * cos_w0
-        a2 = 1 - alpha / gain_linear
+        a0 = k2_1 + bandwidth / gain_linear
+        a1 = b1
+        a2 = k2_1 - bandwidth / gain_linear
         
         # Normalize by a0
-        b = np.array([b0/a0, b1/a0, b2/a0])
-        a = np.array([1.0, a1/a0, a2/a0])
+        section = (b0 / a0, b1 / a0, b2 / a0, a1 / a0, a2 / a0)
+        
+        self._section = section
+        self._coeffs = (section[:3], (1.0,) + section[3:])
+        self._coeffs_rate = sample_rate
+        self._coeffs_dirty = False
+        
+    def get_filter_coefficients(self, sample_rate):
+        """
+        Calculate biquad filter coefficients for this band.
+        
+        The coefficients are cached and only recomputed when a band
+        parameter or the sample rate changes.
+        
+        Args:
+            sample_rate (int): Sample rate in Hz
+            
+        Returns:
+            tuple: (b, a) filter coefficients
+        """
+        if self._coeffs_dirty or sample_rate != self._coeffs_rate:
+            self._compute(sample_rate)
+        return self._coeffs
         
-        return b, a
+    def get_section(self, sample_rate):
+        """
+        Return this band's biquad as one flat, a0-normalized row.
+        
+        Uses the same cache as :meth:`get_filter_coefficients`.
+        
+        Args:
+            sample_rate (int): Sample rate in Hz
+            
+        Returns:
+            tuple: (b0, b1, b2, a1, a2) as Python floats
+        """
+        if self._coeffs_dirty or sample_rate != self._coeffs_rate:
+            self._compute(sample_rate)
+        return self._section
 
 
 class AudioProcessor:
     """Process audio data through an equalizer filter chain."""
     
-    def __init__(self, sample_rate=44100):
+    def __init__(self, sample_rate=44100, channels=1):
         """
         Initialize the audio processor.
         
         Args:
             sample_rate (int): Sample rate in Hz (default 44100)
+            channels (int): Number of audio channels (default 1). Mono audio
+                is a 1-D array; multichannel audio is an interleaved
+                (frames, channels) array.
         """
         self.sample_rate = sample_rate
+        self.channels = channels
         self.bands = []
-        self.filter_states = []
+        
+        # Coefficient rows (b0, b1, b2, a1, a2) and filter state for the cascade
+        self._rebuild_coeffs()
+        
+        # Frequency grid, z^-1 powers and magnitude buffer for the last
+        # frequency response, reused while the same grid is requested
+        self._response_grid = None
+        self._response_rate = None
+        
+    @property
+    def filter_states(self):
+        """list: Per-band filter state, or None for bands not yet initialized."""
+        if not self._states_ready:
+            return [None] * len(self.bands)
+        return list(self._state)
         
     def add_band(self, frequency, gain_db, q_factor=1.0):
         """
@@ -90,74 +192,335 @@ class AudioProcessor:
         """
         band = EqualizerBand(frequency, gain_db, q_factor)
         self.bands.append(band)
-        self.filter_states.append(None)
+        
+        state, state_fixed, ready = self._state, self._state_fixed, self._states_ready
+        self._rebuild_coeffs()
+        
+        # Bands that were already running keep their state; the new one
+        # starts from rest
+        if ready:
+            self._state[:-1] = state
+            self._state_fixed[:-1] = state_fixed
+            self._states_ready = True
+        
+    def set_bands(self, specs):
+        """
+        Replace all equalizer bands in one step.
+        
+        With the same number of bands as before, the existing bands are
+        retuned in place, so only changed coefficient rows are refreshed and
+        the running filter state is kept. Otherwise the coefficient and
+        state arrays are rebuilt once for the whole list.
+        
+        Args:
+            specs (iterable): (frequency, gain_db) or
+                (frequency, gain_db, q_factor) tuples, one per band
+        """
+        bands = [EqualizerBand(*spec) for spec in specs]
+        
+        if len(bands) == len(self.bands):
+            for band, new in zip(self.bands, bands):
+                band.frequency = new.frequency
+                band.gain_db = new.gain_db
+                band.q_factor = new.q_factor
+            self._update_coeffs()
+            return
+            
+        self.bands = bands
+        self._rebuild_coeffs()
         
     def clear_bands(self):
         """Remove all equalizer bands."""
         self.bands.clear()
-        self.filter_states.clear()
+        self._rebuild_coeffs()
+        
+    def _rebuild_coeffs(self):
+        """
+        Rebuild the coefficient and state arrays for the current band list.
+        
+        Coefficients live in one contiguous (N, 5) float32 block so the
+        cascade kernel streams through them without touching band objects.
+        """
+        num_bands = len(self.bands)
+        self._coeffs = np.zeros((num_bands, 5), dtype=np.float32)
+        
+        # Second-order sections (b0, b1, b2, 1, a1, a2): float64 for the
+        # frequency response, float32 so the scipy fallback filters in single
+        # precision like the compiled kernels
+        self._sos = np.zeros((num_bands, 6), dtype=np.float64)
+        self._sos[:, 3] = 1.0
+        self._sos32 = self._sos.astype(np.float32)
+        
+        if self.channels == 1:
+            self._state = np.zeros((num_bands, 2), dtype=np.float32)
+        else:
+            self._state = np.zeros((num_bands, 2, self.channels), dtype=np.float32)
+        self._states_ready = False
+        
+        # Q2.30 copies of the coefficients and state for the fixed-point path
+        self._coeffs_fixed = np.zeros((num_bands, 5), dtype=np.int64)
+        self._state_fixed = np.zeros(self._state.shape, dtype=np.int64)
+        
+        # Unit-step steady state and DC gain of each section, kept up to date
+        # with the coefficients so starting the filters needs no solver
+        self._zi_unit = np.zeros((num_bands, 2), dtype=np.float64)
+        self._dc_gain = np.ones(num_bands, dtype=np.float64)
+        
+        # Kernels specialized to the band count (float32 and int16 input),
+        # fetched on first use
+        self._kernel = None
+        self._kernel_i16 = None
+        
+        # Band coefficients each row was last built from, and whether the
+        # row is an identity section (a 0 dB band)
+        self._row_sources = [None] * num_bands
+        self._identity = np.zeros(num_bands, dtype=bool)
+        self._update_coeffs()
         
-    def process_block(self, audio_data):
+    def _update_coeffs(self):
+        """Refresh the coefficient rows of bands whose settings changed."""
+        for k, band in enumerate(self.bands):
+            section = band.get_section(self.sample_rate)
+            if section is not self._row_sources[k]:
+                b0, b1, b2, a1, a2 = section
+                self._coeffs[k] = section
+                self._coeffs_fixed[k] = to_fixed_point(section)
+                self._sos[k] = (b0, b1, b2, 1.0, a1, a2)
+                self._sos32[k] = self._sos[k]
+                
+                # Closed form of signal.lfilter_zi(b, a) for one biquad
+                gain = (b0 + b1 + b2) / (1.0 + a1 + a2)
+                self._zi_unit[k] = (gain - b0, b2 - a2 * gain)
+                self._dc_gain[k] = gain
+                self._identity[k] = b0 == 1.0 and b1 == a1 and b2 == a2
+                self._row_sources[k] = section
+            
+    def _bypassed(self):
+        """
+        Refresh the coefficients and check whether filtering can be skipped.
+        
+        With no bands, or only 0 dB bands (identity sections), the output
+        equals the input. The filter state is then reset once, so the
+        filters start cleanly from the signal when a band is changed again.
+        
+        Returns:
+            bool: True if the input can be passed through unchanged
+        """
+        self._update_coeffs()
+        if not self._identity.all():
+            return False
+            
+        if self._states_ready:
+            self.reset_states()
+        return True
+        
+    def _init_states(self, first_sample):
+        """
+        Initialize filter states for a steady-state start.
+        
+        Args:
+            first_sample (float or numpy.ndarray): First sample of the signal,
+                one value per channel for multichannel audio
+        """
+        # Steady-state output of each band is the input of the next one
+        levels = np.ones(len(self.bands))
+        levels[1:] = np.cumprod(self._dc_gain[:-1])
+        
+        zi = self._zi_unit * levels[:, np.newaxis]
+        state = np.multiply.outer(zi, np.asarray(first_sample, dtype=np.float64))
+        self._state[...] = state
+        self._state_fixed[...] = to_fixed_point(state * (1 << SAMPLE_FRACTION_BITS))
+        self._states_ready = True
+        
+    def process_block(self, audio_data, out=None):
         """
         Process a block of audio data through all equalizer bands.
         
+        When no band changes the signal (no bands, or all at 0 dB) the
+        cascade is skipped and ``audio_data`` itself is returned, or copied
+        into ``out``; the result is not a fresh array in that case.
+        
         Args:
             audio_data (numpy.ndarray): Input audio data
+            out (numpy.ndarray): Optional float32 buffer to write the result
+                into; may be ``audio_data`` itself to filter in place
             
         Returns:
             numpy.ndarray: Processed audio data
         """
-        if len(self.bands) == 0:
-            return audio_data
+        if self._bypassed():
+            if out is None:
+                return audio_data
+            if out is not audio_data:
+                np.copyto(out, audio_data, casting='unsafe')
+            return out
             
-        # Convert to float for processing
-        processed = audio_data.astype(np.float32)
+        # Convert to float for processing (no copy if already float32)
+        processed = np.asarray(audio_data, dtype=np.float32)
+        if out is None:
+            out = np.empty_like(processed)
         
-        # Apply each band filter sequentially
-        for i, band in enumerate(self.bands):
-            b, a = band.get_filter_coefficients(self.sample_rate)
+        # Initialize state on the first block for continuity
+        if not self._states_ready:
+            self._init_states(processed[0])
+            
+        if not HAVE_NUMBA:
+            # One scipy call filters every section with all state in C; with
+            # float32 sections, signal and state it never upcasts to float64
+            filtered, self._state = signal.sosfilt(self._sos32, processed, axis=0,
+                                                   zi=self._state)
+            np.copyto(out, filtered, casting='unsafe')
+            return out
             
-            # Apply filter with state preservation for continuity
-            if self.filter_states[i] is None:
-                # Initialize state
-                processed, self.filter_states[i] = signal.lfilter(
-                    b, a, processed, zi=signal.lfilter_zi(b, a) * processed[0]
-                )
-            else:
-                # Continue with previous state
-                processed, self.filter_states[i] = signal.lfilter(
-                    b, a, processed, zi=self.filter_states[i]
-                )
+        # Many channels are filtered in parallel, one thread per channel
+        if self.channels >= PARALLEL_MIN_CHANNELS:
+            return cascade_biquad_multi(processed, self._coeffs, self._state, out)
+            
+        # Run the whole cascade in a single compiled pass per channel
+        if self._kernel is None:
+            self._kernel = get_cascade_kernel(len(self.bands), self.channels)
+        if self.channels == 1:
+            return self._kernel(processed, self._coeffs, self._state, out)
+        for c in range(self.channels):
+            self._kernel(processed[:, c], self._coeffs, self._state[:, :, c], out[:, c])
+        return out
+        
+    def process_block_i16(self, samples, out):
+        """
+        Process a block of int16 samples, scaled to the [-1, 1) float range.
+        
+        With Numba the scaling happens as the cascade reads each sample, so
+        the block is not converted to float in a separate pass first.
         
-        return processed
+        Args:
+            samples (numpy.ndarray): Input int16 samples
+            out (numpy.ndarray): float32 buffer, same shape as ``samples``,
+                to write the result into
+            
+        Returns:
+            numpy.ndarray: ``out``, holding the processed audio
+        """
+        if self._bypassed() or not HAVE_NUMBA or self.channels >= PARALLEL_MIN_CHANNELS:
+            np.multiply(samples, INT16_SCALE, out=out, casting='unsafe')
+            return self.process_block(out, out=out)
+            
+        if not self._states_ready:
+            self._init_states(samples[0] * INT16_SCALE)
+            
+        if self._kernel_i16 is None:
+            self._kernel_i16 = get_cascade_kernel(len(self.bands), self.channels, int16_in=True)
+        if self.channels == 1:
+            return self._kernel_i16(samples, self._coeffs, self._state, out)
+        for c in range(self.channels):
+            self._kernel_i16(samples[:, c], self._coeffs, self._state[:, :, c], out[:, c])
+        return out
+        
+    def process_block_fixed(self, samples, out):
+        """
+        Process a block of int16 samples in Q2.30 fixed point.
+        
+        Samples stay integers from input to output, so there is no int16 to
+        float conversion and back. The output is saturated to int16 rather
+        than normalized. Without Numba this runs the float cascade instead.
+        
+        Args:
+            samples (numpy.ndarray): Input int16 samples
+            out (numpy.ndarray): int16 buffer, same shape as ``samples``,
+                to write the result into
+            
+        Returns:
+            numpy.ndarray: ``out``, holding the processed audio
+        """
+        if self._bypassed():
+            np.copyto(out, samples)
+            return out
+            
+        if not HAVE_NUMBA:
+            work = self.process_block(samples)
+            return saturate_to_i16(work.reshape(-1), out.reshape(-1)).reshape(out.shape)
+            
+        if not self._states_ready:
+            self._init_states(samples[0])
+            
+        if self.channels == 1:
+            return cascade_biquad_fixed(samples, self._coeffs_fixed, self._state_fixed, out)
+        for c in range(self.channels):
+            cascade_biquad_fixed(samples[:, c], self._coeffs_fixed, self._state_fixed[:, :, c],
+                                 out[:, c])
+        return out
         
     def reset_states(self):
         """Reset all filter states."""
-        self.filter_states = [None] * len(self.bands)
+        self._state.fill(0.0)
+        self._state_fixed.fill(0)
+        self._states_ready = False
+        
+    def _get_response_grid(self, frequencies):
+        """
+        Return the cached evaluation grid for a frequency response.
+        
+        Args:
+            frequencies (numpy.ndarray): Frequencies to evaluate (Hz), or
+                None for the default log-spaced grid
+            
+        Returns:
+            tuple: (frequencies, z, z_squared, magnitude buffer)
+        """
+        grid = self._response_grid
+        if grid is not None and self._response_rate == self.sample_rate:
+            if frequencies is None or frequencies is grid[0]:
+                return grid
+                
+        if frequencies is None:
+            frequencies = np.logspace(1, np.log10(self.sample_rate/2), 1000)
+            frequencies.flags.writeable = False
+            
+        z = np.exp(-2j * np.pi * np.asarray(frequencies) / self.sample_rate)
+        grid = (frequencies, z, z * z, np.empty(len(z), dtype=np.float64))
+        
+        self._response_grid = grid
+        self._response_rate = self.sample_rate
+        return grid
         
     def get_frequency_response(self, frequencies=None):
         """
         Calculate the frequency response of the equalizer.
         
+        The default frequency grid, and any array passed in again on the
+        next call, is evaluated from cached z^-1 values. The magnitude is
+        written into a buffer that is reused by later calls, so copy it if
+        it must outlive the next call.
+        
         Args:
             frequencies (numpy.ndarray): Frequencies to evaluate (Hz)
             
         Returns:
             tuple: (frequencies, magnitude_db, phase)
         """
-        if frequencies is None:
-            frequencies = np.logspace(1, np.log10(self.sample_rate/2), 1000)
+        frequencies, z, z2, magnitude_db = self._get_response_grid(frequencies)
             
-        # Start with flat response
-        total_response = np.ones(len(frequencies), dtype=complex)
+        # The float64 (N, 6) second-order sections kept for filtering already
+        # stack every band; only rows of changed bands are refreshed
+        self._update_coeffs()
+        
+        if HAVE_NUMBA:
+            phase = np.empty_like(magnitude_db)
+            cascade_response(self._sos, z, z2, magnitude_db, phase)
+            return frequencies, magnitude_db, phase
+            
+        sos = self._sos[:, :, np.newaxis]
+        
+        # Evaluate every band's transfer function at z^-1 = e^(-jw) in one pass
+        num = sos[:, 0] + sos[:, 1] * z + sos[:, 2] * z2
+        den = 1.0 + sos[:, 4] * z + sos[:, 5] * z2
         
         # Combine all band responses
-        for band in self.bands:
-            b, a = band.get_filter_coefficients(self.sample_rate)
-            w, h = signal.freqz(b, a, worN=frequencies, fs=self.sample_rate)
-            total_response *= h
+        total_response = np.prod(num / den, axis=0)
             
-        magnitude_db = 20 * np.log10(np.abs(total_response))
+        # Take the magnitude in dB once, in place on the reused buffer
+        np.abs(total_response, out=magnitude_db)
+        np.log10(magnitude_db, out=magnitude_db)
+        magnitude_db *= 20
         phase = np.angle(total_response)
         
         return frequencies, magnitude_db, phase
@@ -174,8 +537,9 @@ def normalize_audio(audio_data, target_level=-3.0):
     Returns:
         numpy.ndarray: Normalized audio data
     """
-    # Find peak
-    peak = np.max(np.abs(audio_data))
+    # Find peak from the extremes, without an abs() temporary. As Python
+    # floats, so negating an int16 minimum cannot wrap.
+    peak = max(float(audio_data.max()), -float(audio_data.min()))
     
     if peak == 0:
         return audio_data
@@ -184,29 +548,54 @@ def normalize_audio(audio_data, target_level=-3.0):
     target_linear = 10 ** (target_level / 20.0)
     scale = target_linear / peak
     
-    # Apply scaling
-    return audio_data * scale
+    # Apply scaling in a single pass into the result
+    return np.multiply(audio_data, scale)
+
+
+def _get_fade(fade_samples):
+    """
+    Return cached fade-in/fade-out envelopes of the given length.
+    
+    Args:
+        fade_samples (int): Envelope length in samples
+        
+    Returns:
+        tuple: (fade_in, fade_out) float32 arrays
+    """
+    envelopes = _FADE_CACHE.get(fade_samples)
+    if envelopes is None:
+        fade_in = np.linspace(0, 1, fade_samples, dtype=np.float32)
+        fade_out = fade_in[::-1].copy()
+        envelopes = _FADE_CACHE[fade_samples] = (fade_in, fade_out)
+    return envelopes
 
 
-def apply_fade(audio_data, fade_samples=1000):
+def apply_fade(audio_data, fade_samples=1000, inplace=False):
     """
     Apply fade in/out to prevent clicks.
     
     Args:
         audio_data (numpy.ndarray): Input audio data
         fade_samples (int): Number of samples for fade (default 1000)
+        inplace (bool): Fade ``audio_data`` itself instead of a copy
+            (default False)
         
     Returns:
         numpy.ndarray: Audio data with fades applied
     """
-    result = audio_data.copy()
+    n = min(fade_samples, len(audio_data))
+    fade_in, fade_out = _get_fade(n)
     
-    # Fade in
-    fade_in = np.linspace(0, 1, min(fade_samples, len(result)))
-    result[:len(fade_in)] *= fade_in
+    # Fade in, written straight into the result rather than into a copy
+    if inplace:
+        result = audio_data
+        np.multiply(result[:n], fade_in, out=result[:n])
+    else:
+        result = np.empty_like(audio_data)
+        np.multiply(audio_data[:n], fade_in, out=result[:n])
+        result[n:] = audio_data[n:]
     
     # Fade out
-    fade_out = np.linspace(1, 0, min(fade_samples, len(result)))
-    result[-len(fade_out):] *= fade_out
+    np.multiply(result[-n:], fade_out, out=result[-n:])
     
     return result
@@ -7,15 +7,64 @@ This script processes audio input through a configurable multi-band equalizer.
 """
 
 import sys
+import copy
 import json
 import argparse
+import threading
 import numpy as np
 from pathlib import Path
 
+# orjson parses in C; the standard json module is used without it
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Import PyAudio only if not in test mode
 pyaudio = None
 
-from audio_processor import AudioProcessor, normalize_audio
+from audio_processor import AudioProcessor
+from ring_buffer import RingBuffer
+import filters
+
+# Configuration used when the config file is missing or unreadable
+DEFAULT_CONFIG = {
+    'sample_rate': 44100,
+    'buffer_size': 1024,
+    'channels': 1,
+    'use_fixed_point': False,
+    'bands': []
+}
+
+
+def load_json(path):
+    """
+    Parse a JSON file, using orjson when it is installed.
+    
+    Args:
+        path (str or Path): File to read
+        
+    Returns:
+        The parsed JSON document
+    """
+    data = Path(path).read_bytes()
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def save_json(path, data):
+    """
+    Write a JSON file with two-space indentation, using orjson when it is installed.
+    
+    Args:
+        path (str or Path): File to write
+        data: JSON-serializable document
+    """
+    if orjson is not None:
+        Path(path).write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    else:
+        Path(path).write_text(json.dumps(data, indent=2))
 
 
 class SoundEqualizer:
@@ -31,9 +80,32 @@ class SoundEqualizer:
         self.config = self._load_config(config_file)
         self.sample_rate = self.config.get('sample_rate', 44100)
         self.buffer_size = self.config.get('buffer_size', 1024)
+        self.channels = self.config.get('channels', 1)
+        self.use_fixed_point = self.config.get('use_fixed_point', False)
+        
+        # Work buffers reused for every block, interleaved for multichannel audio
+        if self.channels == 1:
+            shape = (self.buffer_size,)
+        else:
+            shape = (self.buffer_size, self.channels)
+        self._work = np.empty(shape, dtype=np.float32)
+        self._in = np.empty(shape, dtype=np.int16)
+        self._out = np.empty(shape, dtype=np.int16)
+        self._callback_out = np.empty(shape, dtype=np.int16)
+        
+        # Ring buffers between the audio callback and the processing worker
+        ring_size = 16 * self.buffer_size * self.channels
+        self._in_ring = RingBuffer(ring_size)
+        self._out_ring = RingBuffer(ring_size)
+        self._data_ready = threading.Event()
+        self._worker = None
+        self.dropped_blocks = 0
+        
+        # Output peak level after normalization (-1 dB)
+        self._target_linear = 10 ** (-1.0 / 20.0)
         
         # Initialize audio processor
-        self.processor = AudioProcessor(sample_rate=self.sample_rate)
+        self.processor = AudioProcessor(sample_rate=self.sample_rate, channels=self.channels)
         
         # Load default bands
         self._load_bands_from_config()
@@ -42,6 +114,7 @@ class SoundEqualizer:
         self.audio = None
         self.stream = None
         self.running = False
+        self._stop_event = threading.Event()
         
     def _load_config(self, config_file):
         """Load configuration from JSON file."""
@@ -52,29 +125,22 @@ class SoundEqualizer:
             return self._default_config()
             
         try:
-            with open(config_path, 'r') as f:
-                return json.load(f)
+            return load_json(config_path)
         except Exception as e:
             print(f"Error loading config: {e}")
             return self._default_config()
             
     def _default_config(self):
         """Return default configuration."""
-        return {
-            'sample_rate': 44100,
-            'buffer_size': 1024,
-            'bands': []
-        }
+        return copy.deepcopy(DEFAULT_CONFIG)
         
     def _load_bands_from_config(self):
         """Load equalizer bands from configuration."""
         bands = self.config.get('bands', [])
-        for band in bands:
-            self.processor.add_band(
-                frequency=band['frequency'],
-                gain_db=band['gain_db'],
-                q_factor=band.get('q_factor', 1.0)
-            )
+        self.processor.set_bands(
+            (band['frequency'], band['gain_db'], band.get('q_factor', 1.0))
+            for band in bands
+        )
             
     def apply_preset(self, preset_name):
         """
@@ -98,14 +164,11 @@ class SoundEqualizer:
             print(f"Error: Preset has {len(gains)} gains but {len(bands)} bands configured.")
             return False
             
-        # Clear and reload bands with new gains
-        self.processor.clear_bands()
-        for band, gain in zip(bands, gains):
-            self.processor.add_band(
-                frequency=band['frequency'],
-                gain_db=gain,
-                q_factor=band.get('q_factor', 1.0)
-            )
+        # Reload bands with new gains in one batch
+        self.processor.set_bands(
+            (band['frequency'], gain, band.get('q_factor', 1.0))
+            for band, gain in zip(bands, gains)
+        )
             
         print(f"Applied preset: {preset_name} - {preset['description']}")
         return True
@@ -139,10 +202,58 @@ class SoundEqualizer:
             desc = config_band.get('description', '')
             print(f"{i+1:<4} {band.frequency:<12.1f} {band.gain_db:>+6.1f} dB  {band.q_factor:<10.2f}  {desc}")
             
+    def _process_buffer(self, samples, output):
+        """
+        Run one block of int16 samples through the equalizer.
+        
+        Args:
+            samples (numpy.ndarray): Input int16 samples
+            output (numpy.ndarray): int16 buffer to receive the result
+        """
+        if self.use_fixed_point:
+            # Integer cascade straight into the output, saturated not normalized
+            self.processor.process_block_fixed(samples, out=output)
+            return
+            
+        work = self._work[:len(samples)]
+        
+        # Process through equalizer into the float work buffer, in [-1, 1)
+        self.processor.process_block_i16(samples, out=work)
+        
+        # Normalize to prevent clipping
+        flat = work.reshape(-1)
+        filters.normalize_inplace(flat, self._target_linear)
+        
+        # Scale, clamp and convert back to int16 in a single pass
+        filters.saturate_to_i16(flat, output.reshape(-1), 32767.0)
+        
+    def _process_loop(self):
+        """Worker thread: filter blocks from the input ring into the output ring."""
+        block = self._in.reshape(-1)
+        
+        while self.running:
+            self._data_ready.wait(timeout=0.1)
+            self._data_ready.clear()
+            
+            try:
+                while self._in_ring.read(block):
+                    self._process_buffer(self._in, self._out)
+                    if not self._out_ring.write(self._out.reshape(-1)):
+                        self.dropped_blocks += 1
+                        print("Warning: output buffer full, dropped a processed block.")
+            except Exception as e:
+                # Without the worker the callback would play silence forever
+                print(f"\nError in processing thread: {e}")
+                self._stop_event.set()
+                return
+                
     def audio_callback(self, in_data, frame_count, time_info, status):
         """
         Callback function for PyAudio stream processing.
         
+        The callback only moves data through the ring buffers; filtering
+        happens on the worker thread so it cannot stall the audio thread.
+        
         Args:
             in_data: Input audio data
             frame_count: Number of frames
@@ -155,17 +266,22 @@ class SoundEqualizer:
         if status:
             print(f"Status: {status}")
             
-        # Convert bytes to numpy array
-        audio_data = np.frombuffer(in_data, dtype=np.int16)
+        # Hand the input to the worker (dropped if the ring is full)
+        self._in_ring.write(np.frombuffer(in_data, dtype=np.int16))
+        self._data_ready.set()
         
-        # Process through equalizer
-        processed = self.processor.process_block(audio_data.astype(np.float32))
+        # Play processed audio, or silence if the worker has not caught up
+        output = self._callback_out[:frame_count]
+        flat = output.reshape(-1)
         
-        # Normalize to prevent clipping
-        processed = normalize_audio(processed, target_level=-1.0)
-        
-        # Convert back to int16
-        output = np.clip(processed, -32768, 32767).astype(np.int16)
+        # A late worker leaves extra blocks queued; drop the oldest so the
+        # output never runs more than one block behind
+        excess = self._out_ring.available() - 2 * flat.size
+        if excess > 0:
+            self._out_ring.discard(excess)
+            
+        if not self._out_ring.read(flat):
+            output.fill(0)
         
         return (output.tobytes(), pyaudio.paContinue)
         
@@ -193,14 +309,33 @@ class SoundEqualizer:
         print(f"\nStarting Sound Equalizer...")
         print(f"Sample rate: {self.sample_rate} Hz")
         print(f"Buffer size: {self.buffer_size} samples")
+        print(f"Channels: {self.channels}")
+        if self.use_fixed_point:
+            print("Processing: fixed point (Q2.30)")
         
         self.list_bands()
         
+        # Compile the filter kernels before the audio callback needs them,
+        # including the variants the configured path uses, with one silent block
+        filters.warmup()
+        self._process_buffer(np.zeros_like(self._in), self._out)
+        self.processor.reset_states()
+        
         try:
+            # Start the processing worker before audio starts flowing, with
+            # no samples left over from a previous run
+            self._in_ring.clear()
+            self._out_ring.clear()
+            self._data_ready.clear()
+            self._stop_event.clear()
+            self.running = True
+            self._worker = threading.Thread(target=self._process_loop, daemon=True)
+            self._worker.start()
+            
             # Open audio stream
             self.stream = self.audio.open(
                 format=pyaudio.paInt16,
-                channels=1,
+                channels=self.channels,
                 rate=self.sample_rate,
                 input=True,
                 output=True,
@@ -209,15 +344,16 @@ class SoundEqualizer:
             )
             
             self.stream.start_stream()
-            self.running = True
             
             print("\nEqualizer is running. Press Ctrl+C to stop.")
             
-            # Keep running until interrupted
-            while self.stream.is_active():
-                pass
+            # Sleep until stopped, interrupted, or the stream ends on its own
+            while not self._stop_event.wait(timeout=0.5):
+                if not self.stream.is_active():
+                    break
                 
         except KeyboardInterrupt:
+            self._stop_event.set()
             print("\n\nStopping equalizer...")
         except Exception as e:
             print(f"\nError: {e}")
@@ -226,6 +362,8 @@ class SoundEqualizer:
             
     def stop(self):
         """Stop the equalizer."""
+        self._stop_event.set()
+        
         if self.stream is not None:
             if self.stream.is_active():
                 self.stream.stop_stream()
@@ -233,6 +371,12 @@ class SoundEqualizer:
             self.stream = None
             
         self.running = False
+        
+        if self._worker is not None:
+            self._data_ready.set()
+            self._worker.join()
+            self._worker = None
+            
         print("Equalizer stopped.")
         
     def cleanup(self):
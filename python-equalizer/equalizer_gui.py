@@ -8,8 +8,9 @@ preset management, and custom preset save/load functionality.
 """
 
 import sys
-import json
 import os
+from contextlib import contextmanager
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, List, Optional
 
@@ -19,7 +20,7 @@ from PyQt5.QtWidgets import (
     QSlider, QLabel, QPushButton, QComboBox, QFileDialog, QMessageBox,
     QGroupBox, QGridLayout, QCheckBox
 )
-from PyQt5.QtCore import Qt, QTimer, pyqtSignal
+from PyQt5.QtCore import Qt, QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
 from PyQt5.QtGui import QFont
 
 import matplotlib
@@ -27,9 +28,22 @@ matplotlib.use('Qt5Agg')
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 
-from equalizer import SoundEqualizer
+from equalizer import SoundEqualizer, load_json, save_json
 from audio_processor import AudioProcessor
 
+# Points in the live response plot; enough for a smooth curve at window width
+VIZ_N_POINTS = 200
+
+
+@lru_cache(maxsize=1)
+def _load_config() -> Dict:
+    """
+    Load config.json once per process.
+    
+    Every window shares the returned dict, so it must be treated as read-only.
+    """
+    return load_json(Path(__file__).parent / 'config.json')
+
 
 class FrequencyVisualization(FigureCanvas):
     """Widget for displaying frequency response visualization."""
@@ -50,14 +64,95 @@ class FrequencyVisualization(FigureCanvas):
         self.axes.set_xlim([20, 20000])
         self.axes.set_ylim([-15, 15])
         
-        # Initialize empty line
-        self.line, = self.axes.plot([], [], 'b-', linewidth=2)
+        # The plot is read-only: skip mouse-move dispatch and navigation
+        self.setMouseTracking(False)
+        self.axes.set_navigate(False)
+        
+        # Initialize empty line. It is animated, i.e. left out of full
+        # redraws, so the axes can be cached once and the line blitted on top.
+        self.line, = self.axes.plot([], [], 'b-', linewidth=2, animated=True)
+        self._frequencies = None
+        self._background = None
         self.figure.tight_layout()
+        self.mpl_connect('draw_event', self._on_draw)
+        
+    def _on_draw(self, event):
+        """Cache the static background after a full redraw (e.g. a resize)."""
+        self._background = self.copy_from_bbox(self.axes.bbox)
+        self.axes.draw_artist(self.line)
         
-    def update_plot(self, frequencies: np.ndarray, magnitude_db: np.ndarray):
-        """Update the frequency response plot."""
-        self.line.set_data(frequencies, magnitude_db)
-        self.draw()
+    def update_plot(self, frequencies: np.ndarray, magnitude_db: np.ndarray,
+                    redraw: bool = True):
+        """
+        Update the frequency response plot.
+        
+        Once the canvas has been drawn, only the line is re-rendered and
+        blitted over the cached background. Before that, a full redraw is
+        queued with draw_idle(). The x data is only replaced when a
+        different frequency array is given.
+        
+        Args:
+            frequencies: Frequencies of the response points (Hz)
+            magnitude_db: Response magnitude at each frequency (dB)
+            redraw: If False, only update the line data and leave the
+                canvas as it is until the next draw
+        """
+        if frequencies is self._frequencies:
+            self.line.set_ydata(magnitude_db)
+        else:
+            self.line.set_data(frequencies, magnitude_db)
+            self._frequencies = frequencies
+            
+        if not redraw:
+            return
+            
+        if self._background is None:
+            self.draw_idle()
+            return
+            
+        self.restore_region(self._background)
+        self.axes.draw_artist(self.line)
+        self.blit(self.axes.bbox)
+
+
+class _VizSignals(QObject):
+    """Carries computed responses from the worker thread to the GUI thread."""
+    
+    done = pyqtSignal(int, object)  # seqno, magnitude_db
+    
+    
+class _VizJob(QRunnable):
+    """Computes the equalizer frequency response off the GUI thread."""
+    
+    def __init__(self, seqno: int, processor: AudioProcessor, gains: List[float],
+                 frequencies: np.ndarray, signals: _VizSignals):
+        """
+        Initialize a visualization job.
+        
+        Args:
+            seqno: Sequence number used to drop outdated results
+            processor: Processor whose bands are retuned to the gains
+            gains: Gain in dB for each band
+            frequencies: Frequencies to evaluate (Hz)
+            signals: Signals used to deliver the result
+        """
+        super().__init__()
+        self.seqno = seqno
+        self.processor = processor
+        self.gains = gains
+        self.frequencies = frequencies
+        self.signals = signals
+        
+    def run(self):
+        """Retune the changed bands and emit the magnitude response."""
+        for band, gain_db in zip(self.processor.bands, self.gains):
+            if band.gain_db != gain_db:
+                band.gain_db = gain_db
+                
+        _, mag_db, _ = self.processor.get_frequency_response(self.frequencies)
+        
+        # The processor reuses its magnitude buffer, so hand over a copy
+        self.signals.done.emit(self.seqno, mag_db.copy())
 
 
 class EqualizerBandControl(QWidget):
@@ -111,20 +206,30 @@ class EqualizerBandControl(QWidget):
         self.slider.valueChanged.connect(self._on_slider_changed)
         layout.addWidget(self.slider)
         
+        # Refresh the label at most once per event-loop turn while dragging
+        self._label_pending = QTimer(self)
+        self._label_pending.setSingleShot(True)
+        self._label_pending.setInterval(0)
+        self._label_pending.timeout.connect(self._update_label)
+        
         self.setLayout(layout)
         
     def _on_slider_changed(self, value: int):
         """Handle slider value changes."""
-        gain_db = value / 10.0
-        self.value_label.setText(f"{gain_db:+.1f} dB")
-        self.value_changed.emit(self.band_index, gain_db)
+        self._label_pending.start()
+        self.value_changed.emit(self.band_index, value / 10.0)
+        
+    def _update_label(self):
+        """Show the slider's current gain in the value label."""
+        self.value_label.setText(f"{self.slider.value() / 10.0:+.1f} dB")
         
     def set_gain(self, gain_db: float):
-        """Set the gain value programmatically."""
+        """Set the gain value programmatically and emit value_changed once."""
         self.slider.blockSignals(True)
         self.slider.setValue(int(gain_db * 10))
         self.value_label.setText(f"{gain_db:+.1f} dB")
         self.slider.blockSignals(False)
+        self.value_changed.emit(self.band_index, self.get_gain())
         
     def get_gain(self) -> float:
         """Get the current gain value."""
@@ -139,24 +244,58 @@ class EqualizerGUI(QMainWindow):
         super().__init__()
         
         # Load configuration
-        config_path = Path(__file__).parent / 'config.json'
-        with open(config_path, 'r') as f:
-            self.config = json.load(f)
-            
+        self.config = _load_config()
+        
         # Initialize equalizer (without starting audio)
         self.equalizer = SoundEqualizer()
         self.enabled = False
         
+        # Processor used only to draw the response; its bands are retuned
+        # in place instead of being rebuilt for every update. The plotted
+        # frequency grid is built once and covers just the visible range.
+        self._viz_freqs = np.logspace(np.log10(20), np.log10(20000), VIZ_N_POINTS)
+        self._viz_processor = AudioProcessor(sample_rate=self.equalizer.sample_rate)
+        self._viz_processor.set_bands(
+            (band['frequency'], 0.0, band.get('q_factor', 1.0))
+            for band in self.config['bands']
+        )
+        
         # Initialize UI
         self._init_ui()
         
-        # Set up visualization update timer
+        # Slider gains mirrored into one array, kept in sync by value_changed
+        self._gains_db = np.zeros(len(self.band_controls))
+        self._batching = False
+        
+        # Coalesce visualization requests into one redraw per event-loop turn
+        self._viz_pending = QTimer(self)
+        self._viz_pending.setSingleShot(True)
+        self._viz_pending.setInterval(0)
+        self._viz_pending.timeout.connect(self._do_update_visualization)
+        
+        # The response is computed on one worker thread, which is the only
+        # thread that touches _viz_processor; stale results are dropped
+        self._viz_seqno = 0
+        self._last_viz_digest = None
+        self._viz_pool = QThreadPool(self)
+        self._viz_pool.setMaxThreadCount(1)
+        self._viz_signals = _VizSignals(self)
+        self._viz_signals.done.connect(self._on_viz_done)
+        
+        # Apply presets once the selection settles (e.g. holding an arrow key)
+        self._pending_preset = None
+        self._preset_debounce = QTimer(self)
+        self._preset_debounce.setSingleShot(True)
+        self._preset_debounce.setInterval(75)
+        self._preset_debounce.timeout.connect(self._apply_pending_preset)
+        
+        # Updates are event-driven; this is only a slow safety refresh
         self.viz_timer = QTimer()
         self.viz_timer.timeout.connect(self._update_visualization)
-        self.viz_timer.start(500)  # Update every 500ms
+        self.viz_timer.start(2000)
         
         # Initial visualization update
-        self._update_visualization()
+        self._do_update_visualization()
         
     def _init_ui(self):
         """Initialize the user interface."""
@@ -254,7 +393,21 @@ class EqualizerGUI(QMainWindow):
         
     def _on_enable_changed(self, state: int):
         """Handle enable/disable checkbox changes."""
-        self.enabled = (state == Qt.Checked)
+        self._set_enabled(state == Qt.Checked)
+        
+    def _set_enabled(self, enabled: bool):
+        """
+        Enable or disable the equalizer.
+        
+        The checkbox is updated to match without re-entering its handler.
+        
+        Args:
+            enabled: Whether the equalizer should process audio
+        """
+        self.enable_checkbox.blockSignals(True)
+        self.enable_checkbox.setChecked(enabled)
+        self.enable_checkbox.blockSignals(False)
+        self.enabled = enabled
         
         if self.enabled:
             # Start the equalizer
@@ -266,13 +419,18 @@ class EqualizerGUI(QMainWindow):
                 self._update_status_message("Equalizer enabled (audio processing requires PyAudio)")
             except Exception as e:
                 QMessageBox.warning(self, "Error", f"Failed to enable equalizer: {e}")
-                self.enable_checkbox.setChecked(False)
-                self.enabled = False
+                self._set_enabled(False)
         else:
             self._update_status_message("Equalizer disabled")
             
     def _on_band_changed(self, band_index: int, gain_db: float):
         """Handle band slider changes."""
+        self._gains_db[band_index] = gain_db
+        
+        # A batch applies everything once when it ends
+        if self._batching:
+            return
+            
         if self.enabled:
             # Update the equalizer's band configuration
             bands = self.equalizer.processor.bands
@@ -284,7 +442,13 @@ class EqualizerGUI(QMainWindow):
         
     def _on_preset_changed(self, index: int):
         """Handle preset selection changes."""
-        preset_name = self.preset_combo.itemData(index)
+        # Only the last selection within the debounce interval is applied
+        self._pending_preset = self.preset_combo.itemData(index)
+        self._preset_debounce.start()
+        
+    def _apply_pending_preset(self):
+        """Apply the most recently selected preset."""
+        preset_name = self._pending_preset
         
         if preset_name is None:
             return
@@ -294,64 +458,93 @@ class EqualizerGUI(QMainWindow):
         gains = preset['gains']
         
         # Update sliders
-        for i, gain in enumerate(gains):
-            if i < len(self.band_controls):
-                self.band_controls[i].set_gain(gain)
-                
-        # Apply to equalizer if enabled
-        if self.enabled:
-            self._apply_current_settings()
-            
-        self._update_visualization()
+        self.set_gains(gains)
+        
         self._update_status_message(f"Applied preset: {preset_name}")
         
     def _reset_all_bands(self):
         """Reset all bands to 0 dB."""
-        for control in self.band_controls:
-            control.set_gain(0.0)
+        self.set_gains(np.zeros(len(self.band_controls)))
+        
+        self._update_status_message("All bands reset to 0 dB")
+        
+    def set_gains(self, gains):
+        """
+        Set the gain of every band at once.
+        
+        The equalizer (if enabled) and the plot are updated once for the
+        whole set rather than once per band.
+        
+        Args:
+            gains: Gain in dB per band, in band order
+        """
+        with self._batch_update():
+            for control, gain in zip(self.band_controls, gains):
+                control.set_gain(gain)
+                
+    def get_gains(self) -> np.ndarray:
+        """
+        Get the gain of every band.
+        
+        Returns:
+            Copy of the band gains in dB, in band order
+        """
+        return self._gains_db.copy()
+        
+    @contextmanager
+    def _batch_update(self):
+        """
+        Group several slider changes into one equalizer update and redraw.
+        
+        Inside the block, band changes only record their gains. On exit the
+        equalizer is updated once (if enabled) and one redraw is scheduled.
+        """
+        self._batching = True
+        try:
+            yield
+        finally:
+            self._batching = False
             
         if self.enabled:
             self._apply_current_settings()
-            
         self._update_visualization()
-        self._update_status_message("All bands reset to 0 dB")
         
     def _apply_current_settings(self):
         """Apply current slider values to the equalizer."""
-        # Clear existing bands
-        self.equalizer.processor.clear_bands()
+        # Retunes the existing bands in place when the band count matches
+        self.equalizer.processor.set_bands(
+            (band['frequency'], gain_db, band.get('q_factor', 1.0))
+            for band, gain_db in zip(self.config['bands'], self._gains_db.tolist())
+        )
         
-        # Add bands with current gains
-        bands = self.config['bands']
-        for i, band in enumerate(bands):
-            if i < len(self.band_controls):
-                gain_db = self.band_controls[i].get_gain()
-                self.equalizer.processor.add_band(
-                    frequency=band['frequency'],
-                    gain_db=gain_db,
-                    q_factor=band.get('q_factor', 1.0)
-                )
-                
     def _update_visualization(self):
-        """Update the frequency response visualization."""
-        # Apply current settings to a temporary processor for visualization
-        temp_processor = AudioProcessor(sample_rate=self.equalizer.sample_rate)
-        
-        bands = self.config['bands']
-        for i, band in enumerate(bands):
-            if i < len(self.band_controls):
-                gain_db = self.band_controls[i].get_gain()
-                temp_processor.add_band(
-                    frequency=band['frequency'],
-                    gain_db=gain_db,
-                    q_factor=band.get('q_factor', 1.0)
-                )
-                
-        # Get frequency response
-        freqs, mag_db, _ = temp_processor.get_frequency_response()
-        
-        # Update plot
-        self.freq_viz.update_plot(freqs, mag_db)
+        """Schedule a visualization update for the next event-loop turn."""
+        # Restarting an already pending single-shot timer keeps one update
+        self._viz_pending.start()
+        
+    def _do_update_visualization(self):
+        """Start computing the frequency response for the current gains."""
+        # Nothing to do if the gains are the ones last plotted
+        digest = self._gains_db.tobytes()
+        if digest == self._last_viz_digest:
+            return
+        self._last_viz_digest = digest
+        
+        self._viz_seqno += 1
+        self._viz_pool.start(_VizJob(
+            self._viz_seqno,
+            self._viz_processor,
+            self._gains_db.tolist(),
+            self._viz_freqs,
+            self._viz_signals
+        ))
+        
+    def _on_viz_done(self, seqno: int, mag_db: np.ndarray):
+        """Plot a computed response unless a newer one has been requested."""
+        if seqno != self._viz_seqno:
+            return
+            
+        self.freq_viz.update_plot(self._viz_freqs, mag_db)
         
     def _save_custom_preset(self):
         """Save current settings as a custom preset file."""
@@ -366,7 +559,7 @@ class EqualizerGUI(QMainWindow):
             return
             
         # Collect current gains
-        gains = [control.get_gain() for control in self.band_controls]
+        gains = self._gains_db.tolist()
         
         # Create preset data
         preset_data = {
@@ -376,9 +569,8 @@ class EqualizerGUI(QMainWindow):
         }
         
         try:
-            with open(filename, 'w') as f:
-                json.dump(preset_data, f, indent=2)
-                
+            save_json(filename, preset_data)
+            
             QMessageBox.information(self, "Success", f"Preset saved to {filename}")
             self._update_status_message(f"Preset saved to {filename}")
         except Exception as e:
@@ -397,9 +589,8 @@ class EqualizerGUI(QMainWindow):
             return
             
         try:
-            with open(filename, 'r') as f:
-                preset_data = json.load(f)
-                
+            preset_data = load_json(filename)
+            
             # Validate preset data
             if 'gains' not in preset_data:
                 raise ValueError("Invalid preset file: missing 'gains' field")
@@ -410,14 +601,7 @@ class EqualizerGUI(QMainWindow):
                 raise ValueError(f"Preset has {len(gains)} bands, expected {len(self.band_controls)}")
                 
             # Apply gains to sliders
-            for i, gain in enumerate(gains):
-                self.band_controls[i].set_gain(gain)
-                
-            # Apply to equalizer if enabled
-            if self.enabled:
-                self._apply_current_settings()
-                
-            self._update_visualization()
+            self.set_gains(gains)
             
             description = preset_data.get('description', 'Custom preset')
             QMessageBox.information(self, "Success", f"Loaded preset: {description}")
@@ -432,6 +616,9 @@ class EqualizerGUI(QMainWindow):
         
     def closeEvent(self, event):
         """Handle window close event."""
+        # Let a running response computation finish
+        self._viz_pool.waitForDone()
+        
         # Clean up equalizer resources
         if self.enabled:
             self.equalizer.cleanup()
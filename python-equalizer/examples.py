@@ -14,8 +14,8 @@ from pathlib import Path
 # Add parent directory to path to import equalizer module
 sys.path.insert(0, str(Path(__file__).parent))
 
-from audio_processor import AudioProcessor, EqualizerBand
-import numpy as np
+# numpy and audio_processor (which pulls in scipy and Numba) are imported
+# inside the examples that need them, so importing this module stays cheap
 
 
 def example1_test_frequency_response():
@@ -24,6 +24,9 @@ def example1_test_frequency_response():
     print("Example 1: Frequency Response Calculation")
     print("=" * 60)
     
+    import numpy as np
+    from audio_processor import AudioProcessor
+    
     # Create processor with sample rate
     processor = AudioProcessor(sample_rate=44100)
     
@@ -55,6 +58,9 @@ def example2_process_audio_block():
     print("Example 2: Process Audio Block")
     print("=" * 60)
     
+    import numpy as np
+    from audio_processor import AudioProcessor
+    
     # Create processor
     processor = AudioProcessor(sample_rate=44100)
     
@@ -67,17 +73,24 @@ def example2_process_audio_block():
     duration = 1.0  # seconds
     num_samples = int(processor.sample_rate * duration)
     
-    # Create white noise
-    audio_signal = np.random.randn(num_samples).astype(np.float32) * 0.1
+    # Create white noise, drawn directly as float32 and scaled in place
+    rng = np.random.default_rng()
+    audio_signal = rng.standard_normal(num_samples, dtype=np.float32)
+    audio_signal *= 0.1
     
+    # Mean square via a dot product, without a squared temporary array
+    input_rms = np.sqrt(np.dot(audio_signal, audio_signal) / num_samples)
     print(f"\nGenerated test signal: {num_samples} samples")
-    print(f"Input RMS level: {np.sqrt(np.mean(audio_signal**2)):.4f}")
+    print(f"Input RMS level: {input_rms:.4f}")
     
     # Process through equalizer
     processed = processor.process_block(audio_signal)
     
-    print(f"Output RMS level: {np.sqrt(np.mean(processed**2)):.4f}")
-    print(f"Peak level: {np.max(np.abs(processed)):.4f}")
+    # The peak comes from the extremes, so no abs() copy is needed either
+    output_rms = np.sqrt(np.dot(processed, processed) / num_samples)
+    peak = max(processed.max(), -processed.min())
+    print(f"Output RMS level: {output_rms:.4f}")
+    print(f"Peak level: {peak:.4f}")
     print()
 
 
@@ -87,6 +100,8 @@ def example3_band_manipulation():
     print("Example 3: Dynamic Band Manipulation")
     print("=" * 60)
     
+    from audio_processor import AudioProcessor
+    
     # Create processor
     processor = AudioProcessor(sample_rate=44100)
     
@@ -131,6 +146,8 @@ def example4_filter_coefficients():
     print("Example 4: Filter Coefficients")
     print("=" * 60)
     
+    from audio_processor import EqualizerBand
+    
     # Create a single band
     band = EqualizerBand(frequency=1000, gain_db=6.0, q_factor=1.0)
     
@@ -0,0 +1,448 @@
+#!/usr/bin/env python3
+"""
+Filter Kernels for Sound Equalizer
+
+This module provides the compiled DSP kernels used on the real-time audio
+path. The kernels are compiled with Numba so that the per-sample loops run
+as native code instead of through the Python interpreter. They release the
+GIL while they run, so the audio callback thread is never held up behind
+the processing worker.
+
+Numba is optional. Without it the kernels still work as plain Python
+functions, and AudioProcessor switches to scipy's sosfilt for the cascade.
+"""
+
+import sys
+
+import numpy as np
+
+try:
+    from numba import njit, prange
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        """Stand-in for numba.njit that leaves the function uncompiled."""
+        def decorator(func):
+            return func
+        return decorator
+
+# Numba's on-disk cache locates itself next to the .py source, which a frozen
+# (PyInstaller) bundle does not ship, so compile in memory there instead
+_CACHE = not getattr(sys, 'frozen', False)
+
+# Scale from int16 sample values to the [-1, 1) float range
+INT16_SCALE = 1.0 / 32768.0
+
+# Fractional bits of the Q2.30 fixed-point coefficients
+FIXED_POINT_BITS = 30
+
+# Extra fractional bits carried on int16 samples inside the fixed-point
+# cascade, so rounding noise is not amplified by low-frequency poles
+SAMPLE_FRACTION_BITS = 12
+
+# From this many channels on, channels are filtered on parallel threads;
+# for fewer, waking the thread pool costs about as much as it saves
+PARALLEL_MIN_CHANNELS = 4
+
+
+@njit(cache=_CACHE, fastmath=True, nogil=True)
+def cascade_biquad(x, coeffs, z, out):
+    """
+    Filter a signal through a cascade of biquad sections.
+
+    Each section is evaluated in Direct Form II Transposed. The signal is
+    walked once and every sample is passed through all sections before
+    moving on, so the intermediate values never leave registers. ``out``
+    may be the same array as ``x`` to filter in place.
+
+    Args:
+        x (numpy.ndarray): Input samples (float32)
+        coeffs (numpy.ndarray): (N, 5) array of (b0, b1, b2, a1, a2) rows,
+            already normalized by a0
+        z (numpy.ndarray): (N, 2) filter state, updated in place
+        out (numpy.ndarray): Output buffer, same length as ``x``
+
+    Returns:
+        numpy.ndarray: ``out``, holding the filtered samples
+    """
+    num_sections = coeffs.shape[0]
+
+    for n in range(x.shape[0]):
+        xn = x[n]
+        for k in range(num_sections):
+            b0 = coeffs[k, 0]
+            b1 = coeffs[k, 1]
+            b2 = coeffs[k, 2]
+            a1 = coeffs[k, 3]
+            a2 = coeffs[k, 4]
+
+            yn = b0 * xn + z[k, 0]
+            z[k, 0] = b1 * xn - a1 * yn + z[k, 1]
+            z[k, 1] = b2 * xn - a2 * yn
+            xn = yn
+        out[n] = xn
+
+    return out
+
+
+@njit(cache=_CACHE, fastmath=True, nogil=True)
+def cascade_biquad_i16_in(x, coeffs, z, out):
+    """
+    Filter int16 samples through a cascade of biquad sections.
+
+    Samples are scaled to the [-1, 1) float range as they are read, so no
+    separate conversion pass over the buffer is needed.
+
+    Args:
+        x (numpy.ndarray): Input samples (int16)
+        coeffs (numpy.ndarray): (N, 5) array of (b0, b1, b2, a1, a2) rows,
+            already normalized by a0
+        z (numpy.ndarray): (N, 2) filter state, updated in place
+        out (numpy.ndarray): float32 output buffer, same length as ``x``
+
+    Returns:
+        numpy.ndarray: ``out``, holding the filtered samples
+    """
+    num_sections = coeffs.shape[0]
+    scale = np.float32(INT16_SCALE)
+
+    for n in range(x.shape[0]):
+        xn = np.float32(x[n]) * scale
+        for k in range(num_sections):
+            b0 = coeffs[k, 0]
+            b1 = coeffs[k, 1]
+            b2 = coeffs[k, 2]
+            a1 = coeffs[k, 3]
+            a2 = coeffs[k, 4]
+
+            yn = b0 * xn + z[k, 0]
+            z[k, 0] = b1 * xn - a1 * yn + z[k, 1]
+            z[k, 1] = b2 * xn - a2 * yn
+            xn = yn
+        out[n] = xn
+
+    return out
+
+
+@njit(cache=_CACHE, nogil=True)
+def cascade_biquad_fixed(x, coeffs, z, out):
+    """
+    Filter int16 samples through a cascade of biquad sections in fixed point.
+
+    Coefficients are Q2.30 integers and samples carry
+    ``SAMPLE_FRACTION_BITS`` extra fractional bits, so every product and
+    sum is exact integer arithmetic on 64-bit accumulators. Each section's
+    output is rounded back to that sample precision, and the final output
+    is rounded and saturated to int16.
+
+    Args:
+        x (numpy.ndarray): Input samples (int16)
+        coeffs (numpy.ndarray): (N, 5) int64 array of Q2.30
+            (b0, b1, b2, a1, a2) rows, see :func:`to_fixed_point`
+        z (numpy.ndarray): (N, 2) int64 filter state, in Q2.30 times the
+            extended sample units; updated in place
+        out (numpy.ndarray): int16 output buffer, same length as ``x``
+
+    Returns:
+        numpy.ndarray: ``out``, holding the filtered samples
+    """
+    num_sections = coeffs.shape[0]
+    half = np.int64(1) << (FIXED_POINT_BITS - 1)
+    sample_half = np.int64(1) << (SAMPLE_FRACTION_BITS - 1)
+
+    for n in range(x.shape[0]):
+        xn = np.int64(x[n]) << SAMPLE_FRACTION_BITS
+        for k in range(num_sections):
+            yn = (coeffs[k, 0] * xn + z[k, 0] + half) >> FIXED_POINT_BITS
+            z[k, 0] = coeffs[k, 1] * xn - coeffs[k, 3] * yn + z[k, 1]
+            z[k, 1] = coeffs[k, 2] * xn - coeffs[k, 4] * yn
+            xn = yn
+        xn = (xn + sample_half) >> SAMPLE_FRACTION_BITS
+        out[n] = min(max(xn, -32768), 32767)
+
+    return out
+
+
+def to_fixed_point(values):
+    """
+    Quantize coefficients or state to Q2.30 integers.
+
+    Args:
+        values (array_like): Float values; coefficients must lie in [-2, 2)
+
+    Returns:
+        numpy.ndarray: int64 array of ``round(values * 2**30)``
+    """
+    return np.rint(np.multiply(values, 1 << FIXED_POINT_BITS)).astype(np.int64)
+
+
+@njit(cache=_CACHE, fastmath=True, nogil=True, parallel=True)
+def cascade_biquad_multi(x, coeffs, z, out):
+    """
+    Filter interleaved multichannel audio through a cascade of biquad sections.
+
+    All channels share the same coefficients but keep independent state.
+    Each channel is run through the whole block on its own, so the recursion
+    for one channel never waits on loads and stores for the others, and the
+    channels are spread over Numba's thread pool.
+
+    Args:
+        x (numpy.ndarray): (frames, channels) input samples (float32)
+        coeffs (numpy.ndarray): (N, 5) array of (b0, b1, b2, a1, a2) rows,
+            already normalized by a0
+        z (numpy.ndarray): (N, 2, channels) filter state, updated in place
+        out (numpy.ndarray): (frames, channels) output buffer; may be ``x``
+
+    Returns:
+        numpy.ndarray: ``out``, holding the filtered samples
+    """
+    for c in prange(x.shape[1]):
+        cascade_biquad(x[:, c], coeffs, z[:, :, c], out[:, c])
+
+    return out
+
+
+@njit(cache=_CACHE, fastmath=True, nogil=True)
+def cascade_response(sos, z, z2, magnitude_db, phase):
+    """
+    Evaluate the frequency response of a cascade of biquad sections.
+
+    Each frequency is run through every section before moving on, so the
+    product is accumulated in registers instead of in per-band temporaries.
+
+    Args:
+        sos (numpy.ndarray): (N, 6) float64 second-order sections
+            (b0, b1, b2, 1, a1, a2)
+        z (numpy.ndarray): e^(-jw) at each frequency (complex128)
+        z2 (numpy.ndarray): ``z * z``
+        magnitude_db (numpy.ndarray): float64 output for the magnitude in dB
+        phase (numpy.ndarray): float64 output for the phase in radians
+
+    Returns:
+        numpy.ndarray: ``magnitude_db``
+    """
+    for i in range(z.shape[0]):
+        h = 1.0 + 0.0j
+        for k in range(sos.shape[0]):
+            h *= ((sos[k, 0] + sos[k, 1] * z[i] + sos[k, 2] * z2[i])
+                  / (1.0 + sos[k, 4] * z[i] + sos[k, 5] * z2[i]))
+        magnitude_db[i] = 20.0 * np.log10(np.abs(h))
+        phase[i] = np.angle(h)
+
+    return magnitude_db
+
+
+if HAVE_NUMBA:
+    @njit(cache=_CACHE, fastmath=True, nogil=True)
+    def saturate_to_i16(x, out, scale=1.0):
+        """
+        Clamp float samples to the int16 range and convert them in one pass.
+
+        The clamp compiles to branchless min/max instructions, so this replaces
+        a separate clip pass and cast pass over the buffer.
+
+        Args:
+            x (numpy.ndarray): 1-D float samples
+            out (numpy.ndarray): 1-D int16 output buffer, same length as ``x``
+            scale (float): Factor taking ``x`` to int16 units (default 1.0)
+
+        Returns:
+            numpy.ndarray: ``out``, holding the converted samples
+        """
+        for n in range(x.shape[0]):
+            v = min(max(x[n] * scale, -32768.0), 32767.0)
+            out[n] = np.int16(v)
+
+        return out
+
+    @njit(cache=_CACHE, fastmath=True, nogil=True)
+    def normalize_inplace(x, target_linear):
+        """
+        Scale a signal in place so its peak matches a target level.
+
+        The peak search and the scaling are each a single tight loop over the
+        buffer, and no temporary arrays are allocated.
+
+        Args:
+            x (numpy.ndarray): 1-D float samples, modified in place
+            target_linear (float): Target peak as a linear amplitude
+
+        Returns:
+            numpy.ndarray: ``x``, scaled (unchanged if it is all zeros)
+        """
+        peak = 0.0
+        for n in range(x.shape[0]):
+            peak = max(peak, abs(x[n]))
+
+        if peak == 0.0:
+            return x
+
+        scale = target_linear / peak
+        for n in range(x.shape[0]):
+            x[n] *= scale
+
+        return x
+
+else:
+    # Per-sample Python loops would be far slower than numpy here, so the
+    # fallback uses whole-array operations instead
+    def saturate_to_i16(x, out, scale=1.0):
+        """
+        Clamp float samples to the int16 range and convert them.
+
+        Without Numba ``x`` is scaled and clamped in place before the
+        conversion.
+
+        Args:
+            x (numpy.ndarray): 1-D float samples
+            out (numpy.ndarray): 1-D int16 output buffer, same length as ``x``
+            scale (float): Factor taking ``x`` to int16 units (default 1.0)
+
+        Returns:
+            numpy.ndarray: ``out``, holding the converted samples
+        """
+        if scale != 1.0:
+            np.multiply(x, scale, out=x)
+        np.clip(x, -32768.0, 32767.0, out=x)
+        np.copyto(out, x, casting='unsafe')
+        return out
+
+    def normalize_inplace(x, target_linear):
+        """
+        Scale a signal in place so its peak matches a target level.
+
+        Args:
+            x (numpy.ndarray): 1-D float samples, modified in place
+            target_linear (float): Target peak as a linear amplitude
+
+        Returns:
+            numpy.ndarray: ``x``, scaled (unchanged if it is all zeros)
+        """
+        peak = np.abs(x).max()
+        if peak == 0.0:
+            return x
+
+        np.multiply(x, target_linear / peak, out=x)
+        return x
+
+
+# Unrolled cascade kernels by number of sections
+_KERNEL_CACHE = {}
+
+# Above this many sections the generic kernel is used instead of unrolling
+MAX_UNROLLED_SECTIONS = 16
+
+
+def _unrolled_cascade_source(num_sections, int16_in=False):
+    """
+    Generate source for a cascade kernel with the section loop unrolled.
+
+    Args:
+        num_sections (int): Number of biquad sections
+        int16_in (bool): Read int16 input and scale it to [-1, 1)
+
+    Returns:
+        str: Python source defining ``kernel(x, coeffs, z, out)``
+    """
+    names = ('b0', 'b1', 'b2', 'a1', 'a2')
+    lines = ['def kernel(x, coeffs, z, out):']
+
+    # Coefficients and state are loaded into locals once per block
+    for k in range(num_sections):
+        for i, name in enumerate(names):
+            lines.append(f'    {name}_{k} = coeffs[{k}, {i}]')
+        lines.append(f'    z0_{k} = z[{k}, 0]')
+        lines.append(f'    z1_{k} = z[{k}, 1]')
+
+    lines.append('    for n in range(x.shape[0]):')
+    if int16_in:
+        lines.append(f'        xn = np.float32(x[n]) * np.float32({INT16_SCALE!r})')
+    else:
+        lines.append('        xn = x[n]')
+    for k in range(num_sections):
+        lines.append(f'        yn = b0_{k} * xn + z0_{k}')
+        lines.append(f'        z0_{k} = b1_{k} * xn - a1_{k} * yn + z1_{k}')
+        lines.append(f'        z1_{k} = b2_{k} * xn - a2_{k} * yn')
+        lines.append('        xn = yn')
+    lines.append('        out[n] = xn')
+
+    for k in range(num_sections):
+        lines.append(f'    z[{k}, 0] = z0_{k}')
+        lines.append(f'    z[{k}, 1] = z1_{k}')
+    lines.append('    return out')
+
+    return '\n'.join(lines) + '\n'
+
+
+def get_cascade_kernel(num_sections, channels=1, int16_in=False):
+    """
+    Return a mono cascade kernel specialized for a fixed number of sections.
+
+    The section loop is unrolled so that every coefficient and state value
+    stays in a local (register) for the whole block instead of being
+    reloaded from the arrays on every sample. Kernels are generated and
+    compiled once per section count and then reused. The returned kernel
+    has the same signature as :func:`cascade_biquad`; multichannel audio
+    is filtered by calling it on each channel's column.
+
+    Args:
+        num_sections (int): Number of biquad sections
+        channels (int): Channel count the kernel will be used for
+            (default 1). Channel columns of interleaved audio are strided,
+            so for more than one channel that variant is compiled as well.
+        int16_in (bool): Return the variant that reads int16 samples and
+            scales them to [-1, 1), like :func:`cascade_biquad_i16_in`
+
+    Returns:
+        callable: Kernel taking ``(x, coeffs, z, out)``
+    """
+    in_dtype = np.int16 if int16_in else np.float32
+    key = (num_sections, int16_in)
+
+    kernel = _KERNEL_CACHE.get(key)
+    if kernel is None:
+        if num_sections > MAX_UNROLLED_SECTIONS:
+            kernel = cascade_biquad_i16_in if int16_in else cascade_biquad
+        else:
+            namespace = {'np': np}
+            exec(_unrolled_cascade_source(num_sections, int16_in), namespace)
+            kernel = njit(fastmath=True, nogil=True)(namespace['kernel'])
+
+            # Compile now rather than on the first audio block
+            kernel(np.zeros(1, dtype=in_dtype), np.zeros((num_sections, 5), dtype=np.float32),
+                   np.zeros((num_sections, 2), dtype=np.float32), np.zeros(1, dtype=np.float32))
+
+        _KERNEL_CACHE[key] = kernel
+
+    if channels > 1:
+        x = np.zeros((1, channels), dtype=in_dtype)[:, 0]
+        z = np.zeros((num_sections, 2, channels), dtype=np.float32)[:, :, 0]
+        out = np.zeros((1, channels), dtype=np.float32)[:, 0]
+        kernel(x, np.zeros((num_sections, 5), dtype=np.float32), z, out)
+
+    return kernel
+
+
+def warmup():
+    """Compile the kernels ahead of time so the audio callback never pays the JIT cost."""
+    if not HAVE_NUMBA:
+        return
+
+    coeffs = np.zeros((1, 5), dtype=np.float32)
+    coeffs[0, 0] = 1.0
+    z = np.zeros((1, 2), dtype=np.float32)
+    x = np.zeros(16, dtype=np.float32)
+    cascade_biquad(x, coeffs, z, x)
+
+    z = np.zeros((1, 2, 2), dtype=np.float32)
+    x = np.zeros((16, 2), dtype=np.float32)
+    cascade_biquad_multi(x, coeffs, z, x)
+
+    cascade_biquad_fixed(np.zeros(16, dtype=np.int16), np.zeros((1, 5), dtype=np.int64),
+                         np.zeros((1, 2), dtype=np.int64), np.zeros(16, dtype=np.int16))
+
+    normalize_inplace(np.zeros(16, dtype=np.float32), 1.0)
+    saturate_to_i16(np.zeros(16, dtype=np.float32), np.zeros(16, dtype=np.int16), 32767.0)
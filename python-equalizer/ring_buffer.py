@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Ring Buffer for Sound Equalizer
+
+This module provides a single-producer/single-consumer ring buffer used to
+hand audio between the PyAudio callback thread and the processing worker
+without taking locks on the real-time thread.
+"""
+
+import numpy as np
+
+
+class RingBuffer:
+    """Single-producer/single-consumer circular buffer of audio samples."""
+
+    def __init__(self, capacity, dtype=np.int16):
+        """
+        Initialize the ring buffer.
+
+        Args:
+            capacity (int): Minimum number of samples to hold; rounded up
+                to the next power of two
+            dtype (numpy.dtype): Sample type (default int16)
+        """
+        size = 1 << max(capacity - 1, 0).bit_length()
+        self._data = np.zeros(size, dtype=dtype)
+        self._mask = size - 1
+
+        # Monotonic write/read counters. Only the producer advances head and
+        # only the consumer advances tail, so neither side needs a lock.
+        self._head = 0
+        self._tail = 0
+
+    @property
+    def capacity(self):
+        """int: Number of samples the buffer can hold."""
+        return self._data.size
+
+    def available(self):
+        """Return the number of samples ready to be read."""
+        return self._head - self._tail
+
+    def space(self):
+        """Return the number of samples that can be written."""
+        return self._data.size - (self._head - self._tail)
+
+    def write(self, samples):
+        """
+        Append samples to the buffer (producer side).
+
+        Args:
+            samples (numpy.ndarray): 1-D array of samples
+
+        Returns:
+            bool: True if written, False if there was not enough space
+        """
+        count = samples.size
+        if count > self.space():
+            return False
+
+        start = self._head & self._mask
+        first = min(count, self._data.size - start)
+        self._data[start:start + first] = samples[:first]
+        self._data[:count - first] = samples[first:]
+
+        # Publish only after the data is in place
+        self._head += count
+        return True
+
+    def read(self, out):
+        """
+        Remove samples from the buffer into ``out`` (consumer side).
+
+        Args:
+            out (numpy.ndarray): 1-D array to fill; its size is the number
+                of samples to read
+
+        Returns:
+            bool: True if ``out`` was filled, False if not enough samples
+        """
+        count = out.size
+        if count > self.available():
+            return False
+
+        start = self._tail & self._mask
+        first = min(count, self._data.size - start)
+        out[:first] = self._data[start:start + first]
+        out[first:] = self._data[:count - first]
+
+        # Release the space only after the data has been copied out
+        self._tail += count
+        return True
+
+    def discard(self, count):
+        """
+        Drop the oldest samples without copying them (consumer side).
+        
+        Args:
+            count (int): Number of samples to drop; clamped to what is stored
+        """
+        self._tail += min(count, self.available())
+        
+    def clear(self):
+        """Empty the buffer. Only safe while neither side is running."""
+        self._head = 0
+        self._tail = 0
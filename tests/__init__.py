@@ -1 +1,10 @@
 # Tests for Sound Equalizer
+
+import sys
+from pathlib import Path
+
+# pytest adds the package directory itself (see setup.cfg); this covers
+# running the tests with unittest
+_PACKAGE_DIR = str(Path(__file__).resolve().parent.parent / 'python-equalizer')
+if _PACKAGE_DIR not in sys.path:
+    sys.path.insert(0, _PACKAGE_DIR)
@@ -0,0 +1,11 @@
+"""
+Shared pytest configuration for the Sound Equalizer tests.
+
+Each pytest-xdist worker imports this file, so the settings below apply
+to every worker process.
+"""
+
+import os
+
+# Qt must pick its platform before the first QApplication is created
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
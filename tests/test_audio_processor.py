@@ -7,12 +7,11 @@ This module contains tests for the EqualizerBand and AudioProcessor classes.
 
 import unittest
 import numpy as np
-from pathlib import Path
-import sys
+from unittest import mock
 
-# Add parent directory to path to import modules
-sys.path.insert(0, str(Path(__file__).parent.parent / 'python-equalizer'))
+from scipy import signal
 
+import audio_processor
 from audio_processor import EqualizerBand, AudioProcessor, normalize_audio, apply_fade
 
 
@@ -59,8 +58,8 @@ class TestEqualizerBand(unittest.TestCase):
         b2, a2 = band.get_filter_coefficients(sample_rate=48000)
         
         # Coefficients should be different for different sample rates
-        self.assertFalse(np.allclose(b1, b2))
-        self.assertFalse(np.allclose(a1, a2))
+        self.assertTrue(np.any(b1 != b2))
+        self.assertTrue(np.any(a1 != a2))
         
     def test_zero_gain(self):
         """Test that zero gain produces nearly unity gain."""
@@ -71,6 +70,73 @@ class TestEqualizerBand(unittest.TestCase):
         # This is a simplified check - exact behavior depends on filter design
         self.assertTrue(np.all(np.isfinite(b)))
         self.assertTrue(np.all(np.isfinite(a)))
+        
+    def test_filter_coefficients_cached(self):
+        """Test that coefficients are reused while parameters are unchanged."""
+        band = EqualizerBand(frequency=1000, gain_db=6.0, q_factor=1.0)
+        
+        first = band.get_filter_coefficients(sample_rate=44100)
+        second = band.get_filter_coefficients(sample_rate=44100)
+        
+        self.assertIs(first, second)
+        
+    def test_filter_coefficients_invalidated_on_change(self):
+        """Test that changing a parameter recomputes the coefficients."""
+        band = EqualizerBand(frequency=1000, gain_db=6.0, q_factor=1.0)
+        b1, a1 = band.get_filter_coefficients(sample_rate=44100)
+        
+        band.gain_db = -6.0
+        b2, a2 = band.get_filter_coefficients(sample_rate=44100)
+        
+        self.assertTrue(np.any(b1 != b2))
+        self.assertTrue(np.any(a1 != a2))
+
+    def test_gain_change_reuses_prewarp(self):
+        """Test that a gain-only change skips the tan() prewarp."""
+        band = EqualizerBand(frequency=1000, gain_db=6.0, q_factor=2.0)
+        band.get_section(sample_rate=44100)
+        
+        band.gain_db = -3.0
+        with mock.patch.object(audio_processor, 'tan', side_effect=AssertionError):
+            section = band.get_section(sample_rate=44100)
+            
+        expected = EqualizerBand(frequency=1000, gain_db=-3.0, q_factor=2.0)
+        self.assertEqual(section, expected.get_section(sample_rate=44100))
+        
+        band.q_factor = 1.0
+        expected.q_factor = 1.0
+        self.assertEqual(band.get_section(sample_rate=48000),
+                         expected.get_section(sample_rate=48000))
+        
+    def test_get_section(self):
+        """Test that the flat section matches the (b, a) coefficients."""
+        band = EqualizerBand(frequency=1000, gain_db=6.0, q_factor=2.0)
+        
+        section = band.get_section(44100)
+        b, a = band.get_filter_coefficients(44100)
+        
+        self.assertEqual(len(section), 5)
+        self.assertTrue(all(isinstance(c, float) for c in section))
+        self.assertEqual(section, tuple(b) + tuple(a[1:]))
+
+    def test_section_matches_cookbook_form(self):
+        """Test that the tan-based coefficients equal the sin/cos cookbook form."""
+        for frequency, gain_db, q_factor in [(60, 6.0, 1.0), (1000, -9.0, 0.5), (15000, 3.0, 4.0)]:
+            band = EqualizerBand(frequency, gain_db, q_factor)
+            
+            gain_linear = 10 ** (gain_db / 20.0)
+            w0 = 2 * np.pi * frequency / 48000
+            alpha = np.sin(w0) / (2 * q_factor)
+            a0 = 1 + alpha / gain_linear
+            expected = [
+                (1 + alpha * gain_linear) / a0,
+                -2 * np.cos(w0) / a0,
+                (1 - alpha * gain_linear) / a0,
+                -2 * np.cos(w0) / a0,
+                (1 - alpha / gain_linear) / a0,
+            ]
+            
+            np.testing.assert_allclose(band.get_section(48000), expected, atol=1e-12)
 
 
 class TestAudioProcessor(unittest.TestCase):
@@ -130,6 +196,50 @@ class TestAudioProcessor(unittest.TestCase):
         self.assertEqual(len(processor.bands), 0)
         self.assertEqual(len(processor.filter_states), 0)
         
+    def test_add_band_keeps_running_state(self):
+        """Test that adding a band does not reset the bands already running."""
+        processor = AudioProcessor(sample_rate=44100)
+        processor.add_band(frequency=100, gain_db=3.0)
+        processor.process_block(np.random.randn(512).astype(np.float32))
+        state = processor._state.copy()
+        
+        processor.add_band(frequency=1000, gain_db=-2.0)
+        
+        np.testing.assert_array_equal(processor.filter_states[0], state[0])
+        np.testing.assert_array_equal(processor.filter_states[1], 0.0)
+        
+    def test_set_bands(self):
+        """Test replacing all bands at once."""
+        processor = AudioProcessor(sample_rate=44100)
+        processor.add_band(frequency=1000, gain_db=6.0)
+        
+        processor.set_bands([(100, 3.0), (1000, -2.0, 2.0), (10000, 1.0)])
+        
+        self.assertEqual(len(processor.bands), 3)
+        self.assertEqual(processor.bands[1].gain_db, -2.0)
+        self.assertEqual(processor.bands[1].q_factor, 2.0)
+        self.assertEqual(processor.bands[2].q_factor, 1.0)
+        self.assertEqual(processor._coeffs.shape, (3, 5))
+        
+    def test_set_bands_same_count_keeps_state(self):
+        """Test that retuning the same number of bands keeps the running state."""
+        processor = AudioProcessor(sample_rate=44100)
+        processor.set_bands([(100, 3.0), (1000, -2.0)])
+        processor.process_block(np.random.randn(512).astype(np.float32))
+        
+        bands = list(processor.bands)
+        state = processor._state
+        processor.set_bands([(100, 6.0), (1000, 2.0)])
+        
+        self.assertEqual(processor.bands, bands)
+        self.assertIs(processor._state, state)
+        self.assertIsNotNone(processor.filter_states[0])
+        self.assertEqual(processor.bands[0].gain_db, 6.0)
+        
+        expected = AudioProcessor(sample_rate=44100)
+        expected.set_bands([(100, 6.0), (1000, 2.0)])
+        np.testing.assert_array_equal(processor._coeffs, expected._coeffs)
+        
     def test_process_block_no_bands(self):
         """Test processing with no bands (pass-through)."""
         processor = AudioProcessor(sample_rate=44100)
@@ -137,10 +247,48 @@ class TestAudioProcessor(unittest.TestCase):
         # Create test signal
         test_signal = np.random.randn(1000).astype(np.float32)
         
-        # Process should return the same signal
+        # Process should hand back the input without copying it
         output = processor.process_block(test_signal)
         
-        np.testing.assert_array_equal(output, test_signal)
+        self.assertIs(output, test_signal)
+        
+        out = np.empty_like(test_signal)
+        self.assertIs(processor.process_block(test_signal, out=out), out)
+        np.testing.assert_array_equal(out, test_signal)
+        
+    def test_process_block_flat_bands(self):
+        """Test that 0 dB bands pass the input through without filtering."""
+        processor = AudioProcessor(sample_rate=44100)
+        processor.set_bands([(100, 0.0), (1000, 0.0), (10000, 0.0)])
+        test_signal = np.random.randn(1000).astype(np.float32)
+        
+        output = processor.process_block(test_signal)
+        
+        self.assertIs(output, test_signal)
+        self.assertEqual(processor.filter_states, [None] * 3)
+        
+        out = np.empty(1000, dtype=np.int16)
+        samples = (test_signal * 1000).astype(np.int16)
+        processor.process_block_fixed(samples, out)
+        np.testing.assert_array_equal(out, samples)
+        
+    def test_process_block_leaves_bypass(self):
+        """Test that changing a 0 dB band filters again from steady state."""
+        processor = AudioProcessor(sample_rate=44100)
+        processor.set_bands([(100, 0.0), (1000, 0.0)])
+        processor.process_block(np.ones(256, dtype=np.float32))
+        
+        processor.bands[1].gain_db = 6.0
+        output = processor.process_block(np.ones(256, dtype=np.float32))
+        
+        self.assertIsNotNone(processor.filter_states[0])
+        np.testing.assert_allclose(output, 1.0, atol=1e-4)
+        
+        # Back to flat: pass-through again with the state cleared
+        processor.bands[1].gain_db = 0.0
+        test_signal = np.random.randn(256).astype(np.float32)
+        self.assertIs(processor.process_block(test_signal), test_signal)
+        self.assertEqual(processor.filter_states, [None, None])
         
     def test_process_block_with_bands(self):
         """Test processing with equalizer bands."""
@@ -157,7 +305,7 @@ class TestAudioProcessor(unittest.TestCase):
         self.assertEqual(len(output), len(test_signal))
         
         # Output should be different from input (filter was applied)
-        self.assertFalse(np.allclose(output, test_signal))
+        self.assertTrue(np.any(output != test_signal))
         
         # Output should be finite
         self.assertTrue(np.all(np.isfinite(output)))
@@ -173,6 +321,131 @@ class TestAudioProcessor(unittest.TestCase):
             output = processor.process_block(test_signal)
             self.assertEqual(len(output), length)
             
+    def test_process_block_in_place(self):
+        """Test processing into a caller-provided output buffer."""
+        processor = AudioProcessor(sample_rate=44100)
+        processor.add_band(frequency=1000, gain_db=6.0)
+        
+        test_signal = np.random.randn(1000).astype(np.float32)
+        expected = processor.process_block(test_signal)
+        
+        processor.reset_states()
+        buffer = test_signal.copy()
+        output = processor.process_block(buffer, out=buffer)
+        
+        self.assertIs(output, buffer)
+        np.testing.assert_allclose(output, expected, rtol=1e-5)
+        
+    def test_process_block_stereo(self):
+        """Test processing interleaved stereo audio."""
+        processor = AudioProcessor(sample_rate=44100, channels=2)
+        processor.add_band(frequency=1000, gain_db=6.0)
+        
+        test_signal = np.random.randn(1000, 2).astype(np.float32)
+        output = processor.process_block(test_signal)
+        
+        self.assertEqual(output.shape, test_signal.shape)
+        self.assertTrue(np.all(np.isfinite(output)))
+        self.assertTrue(np.any(output != test_signal))
+        
+    def test_process_block_stereo_matches_mono(self):
+        """Test that each stereo channel is filtered like a mono signal."""
+        test_signal = np.random.randn(1000, 2).astype(np.float32)
+        
+        stereo = AudioProcessor(sample_rate=44100, channels=2)
+        stereo.add_band(frequency=200, gain_db=6.0)
+        stereo.add_band(frequency=4000, gain_db=-3.0)
+        output = stereo.process_block(test_signal)
+        
+        for c in range(2):
+            mono = AudioProcessor(sample_rate=44100)
+            mono.add_band(frequency=200, gain_db=6.0)
+            mono.add_band(frequency=4000, gain_db=-3.0)
+            expected = mono.process_block(np.ascontiguousarray(test_signal[:, c]))
+            np.testing.assert_allclose(output[:, c], expected, rtol=1e-5, atol=1e-6)
+            
+    def test_process_block_parallel_channels(self):
+        """Test that channels filtered in parallel match mono processing."""
+        test_signal = np.random.randn(1000, 6).astype(np.float32)
+        
+        surround = AudioProcessor(sample_rate=48000, channels=6)
+        surround.add_band(frequency=200, gain_db=6.0)
+        surround.add_band(frequency=4000, gain_db=-3.0)
+        output = surround.process_block(test_signal)
+        
+        for c in range(6):
+            mono = AudioProcessor(sample_rate=48000)
+            mono.add_band(frequency=200, gain_db=6.0)
+            mono.add_band(frequency=4000, gain_db=-3.0)
+            expected = mono.process_block(np.ascontiguousarray(test_signal[:, c]))
+            np.testing.assert_allclose(output[:, c], expected, atol=1e-4)
+            
+    def test_process_block_i16(self):
+        """Test that int16 input is processed as samples scaled to [-1, 1)."""
+        samples = (np.random.randn(1000) * 8000).astype(np.int16)
+        
+        processor = AudioProcessor(sample_rate=44100)
+        processor.add_band(frequency=1000, gain_db=6.0)
+        expected = processor.process_block((samples / 32768.0).astype(np.float32))
+        
+        processor.reset_states()
+        out = np.empty(1000, dtype=np.float32)
+        output = processor.process_block_i16(samples, out=out)
+        
+        self.assertIs(output, out)
+        np.testing.assert_allclose(output, expected, rtol=1e-5, atol=1e-6)
+        
+    def test_process_block_fixed(self):
+        """Test that the fixed-point cascade stays within one LSB of float64."""
+        samples = (np.random.randn(4096) * 3000).astype(np.int16)
+        samples[0] = 0
+        
+        processor = AudioProcessor(sample_rate=44100)
+        processor.add_band(frequency=60, gain_db=6.0)
+        processor.add_band(frequency=1000, gain_db=-4.0)
+        processor.add_band(frequency=12000, gain_db=3.0)
+        
+        out = np.empty_like(samples)
+        output = processor.process_block_fixed(samples, out=out)
+        
+        expected = signal.sosfilt(processor._sos, samples.astype(np.float64))
+        self.assertIs(output, out)
+        self.assertLessEqual(np.abs(output - expected).max(), 1.0)
+        
+    def test_process_block_sosfilt_fallback(self):
+        """Test that the scipy fallback matches the compiled cascade."""
+        test_signal = np.random.randn(1000).astype(np.float32)
+        
+        processor = AudioProcessor(sample_rate=44100)
+        processor.add_band(frequency=100, gain_db=6.0)
+        processor.add_band(frequency=4000, gain_db=-3.0)
+        expected = processor.process_block(test_signal)
+        
+        with mock.patch.object(audio_processor, 'HAVE_NUMBA', False):
+            fallback = AudioProcessor(sample_rate=44100)
+            fallback.add_band(frequency=100, gain_db=6.0)
+            fallback.add_band(frequency=4000, gain_db=-3.0)
+            output = fallback.process_block(test_signal)
+            
+        self.assertEqual(output.dtype, np.float32)
+        self.assertEqual(fallback._state.dtype, np.float32)
+        np.testing.assert_allclose(output, expected, atol=1e-3)
+        
+    def test_process_block_follows_band_changes(self):
+        """Test that editing a band after processing changes the output."""
+        processor = AudioProcessor(sample_rate=44100)
+        processor.add_band(frequency=1000, gain_db=6.0)
+        
+        test_signal = np.random.randn(1000).astype(np.float32)
+        boosted = processor.process_block(test_signal)
+        
+        processor.bands[0].gain_db = 0.0
+        processor.reset_states()
+        flat = processor.process_block(test_signal)
+        
+        np.testing.assert_allclose(flat, test_signal, atol=1e-4)
+        self.assertTrue(np.any(boosted != test_signal))
+        
     def test_reset_states(self):
         """Test resetting filter states."""
         processor = AudioProcessor(sample_rate=44100)
@@ -191,6 +464,19 @@ class TestAudioProcessor(unittest.TestCase):
         # States should be None
         self.assertIsNone(processor.filter_states[0])
         
+    def test_steady_state_start(self):
+        """Test that a constant signal passes through without a start-up transient."""
+        processor = AudioProcessor(sample_rate=44100)
+        processor.add_band(frequency=100, gain_db=6.0)
+        processor.add_band(frequency=5000, gain_db=-3.0)
+        
+        zi = [signal.lfilter_zi(*band.get_filter_coefficients(44100)) for band in processor.bands]
+        np.testing.assert_allclose(processor._zi_unit, zi, atol=1e-12)
+        
+        output = processor.process_block(np.full(256, 0.5, dtype=np.float32))
+        
+        np.testing.assert_allclose(output, 0.5, atol=1e-3)
+        
     def test_get_frequency_response(self):
         """Test frequency response calculation."""
         processor = AudioProcessor(sample_rate=44100)
@@ -211,6 +497,36 @@ class TestAudioProcessor(unittest.TestCase):
         # Frequencies should be in ascending order
         self.assertTrue(np.all(np.diff(freqs) > 0))
         
+    def test_get_frequency_response_matches_sosfreqz(self):
+        """Test the response against scipy and after a gain change."""
+        from scipy import signal
+        
+        processor = AudioProcessor(sample_rate=48000)
+        processor.add_band(frequency=250, gain_db=4.0, q_factor=1.0)
+        processor.add_band(frequency=4000, gain_db=-3.0, q_factor=2.0)
+        processor.get_frequency_response()
+        processor.bands[1].gain_db = 5.0
+        
+        freqs, mag_db, _ = processor.get_frequency_response()
+        
+        sos = [band.get_filter_coefficients(48000)[0] + band.get_filter_coefficients(48000)[1]
+               for band in processor.bands]
+        _, h = signal.sosfreqz(sos, worN=freqs, fs=48000)
+        np.testing.assert_allclose(mag_db, 20 * np.log10(np.abs(h)), atol=1e-9)
+        
+    def test_get_frequency_response_numpy_fallback(self):
+        """Test that the NumPy response matches the compiled kernel."""
+        processor = AudioProcessor(sample_rate=44100)
+        processor.set_bands([(100, 6.0), (1000, -4.0, 2.0), (8000, 3.0)])
+        _, mag_db, phase = processor.get_frequency_response()
+        mag_db = mag_db.copy()
+        
+        with mock.patch.object(audio_processor, 'HAVE_NUMBA', False):
+            _, fallback_mag_db, fallback_phase = processor.get_frequency_response()
+            
+        np.testing.assert_allclose(fallback_mag_db, mag_db, atol=1e-9)
+        np.testing.assert_allclose(fallback_phase, phase, atol=1e-9)
+        
     def test_get_frequency_response_custom_frequencies(self):
         """Test frequency response with custom frequency array."""
         processor = AudioProcessor(sample_rate=44100)
@@ -227,6 +543,49 @@ class TestAudioProcessor(unittest.TestCase):
         # At the peak frequency, gain should be close to 6 dB
         self.assertGreater(mag_db[idx_1000], 3.0)  # At least half the gain
 
+        
+    def test_get_frequency_response_matches_freqz(self):
+        """Test that the combined response matches chained scipy freqz calls."""
+        processor = AudioProcessor(sample_rate=44100)
+        processor.add_band(frequency=100, gain_db=6.0, q_factor=1.0)
+        processor.add_band(frequency=2000, gain_db=-4.0, q_factor=2.0)
+        
+        freqs, mag_db, phase = processor.get_frequency_response()
+        
+        expected = np.ones(len(freqs), dtype=complex)
+        for band in processor.bands:
+            b, a = band.get_filter_coefficients(44100)
+            _, h = signal.freqz(b, a, worN=freqs, fs=44100)
+            expected *= h
+            
+        np.testing.assert_allclose(mag_db, 20 * np.log10(np.abs(expected)), atol=1e-6)
+        np.testing.assert_allclose(phase, np.angle(expected), atol=1e-6)
+
+    def test_get_frequency_response_reuses_grid(self):
+        """Test that repeated calls reuse the grid and follow band changes."""
+        processor = AudioProcessor(sample_rate=44100)
+        processor.add_band(frequency=1000, gain_db=6.0)
+        
+        freqs, mag_db, _ = processor.get_frequency_response()
+        boost = mag_db.copy()
+        
+        processor.bands[0].gain_db = -6.0
+        freqs_again, mag_db_again, _ = processor.get_frequency_response()
+        
+        # A cut mirrors the boost in dB
+        self.assertIs(freqs_again, freqs)
+        np.testing.assert_allclose(mag_db_again, -boost, atol=1e-9)
+        
+    def test_get_frequency_response_follows_sample_rate(self):
+        """Test that the default grid is rebuilt when the sample rate changes."""
+        processor = AudioProcessor(sample_rate=44100)
+        processor.get_frequency_response()
+        
+        processor.sample_rate = 48000
+        freqs, _, _ = processor.get_frequency_response()
+        
+        self.assertAlmostEqual(freqs[-1], 24000)
+
 
 class TestNormalizeAudio(unittest.TestCase):
     """Test cases for normalize_audio function."""
@@ -267,6 +626,14 @@ class TestNormalizeAudio(unittest.TestCase):
         # Should return zeros unchanged
         np.testing.assert_array_equal(normalized, audio)
         
+    def test_normalize_int16_full_scale(self):
+        """Test that a full-scale negative int16 peak is handled."""
+        audio = np.array([-32768, 16384, 0], dtype=np.int16)
+        
+        normalized = normalize_audio(audio, target_level=0.0)
+        
+        np.testing.assert_allclose(normalized, [-1.0, 0.5, 0.0])
+        
     def test_normalize_preserves_shape(self):
         """Test that normalization preserves signal shape."""
         audio = np.random.randn(1000).astype(np.float32)
@@ -333,7 +700,36 @@ class TestApplyFade(unittest.TestCase):
         np.testing.assert_array_equal(audio, original)
         
         # Faded should be different
-        self.assertFalse(np.allclose(faded, original))
+        self.assertTrue(np.any(faded != original))
+        
+    def test_apply_fade_linear_ramp(self):
+        """Test that repeated fades use the same linear ramps."""
+        audio = np.ones(1000, dtype=np.float32)
+        
+        first = apply_fade(audio, fade_samples=100)
+        second = apply_fade(audio, fade_samples=100)
+        
+        np.testing.assert_array_equal(first, second)
+        np.testing.assert_allclose(first[:100], np.linspace(0, 1, 100), rtol=1e-6)
+        np.testing.assert_allclose(first[-100:], np.linspace(1, 0, 100), rtol=1e-6)
+        
+    def test_apply_fade_inplace(self):
+        """Test that an in-place fade matches the copying one."""
+        audio = np.random.randn(1000).astype(np.float32)
+        expected = apply_fade(audio, fade_samples=100)
+        
+        faded = apply_fade(audio, fade_samples=100, inplace=True)
+        
+        self.assertIs(faded, audio)
+        np.testing.assert_array_equal(audio, expected)
+        
+    def test_apply_fade_short_signal_matches_inplace(self):
+        """Test overlapping fades with and without a copy."""
+        audio = np.random.randn(50).astype(np.float32)
+        
+        faded = apply_fade(audio, fade_samples=100)
+        
+        np.testing.assert_array_equal(faded, apply_fade(audio.copy(), 100, inplace=True))
 
 
 if __name__ == '__main__':
@@ -8,22 +8,24 @@ This module contains tests for the SoundEqualizer class and main functionality.
 import unittest
 import json
 import tempfile
+import threading
+import numpy as np
 from pathlib import Path
 import sys
+from unittest import mock
 
-# Add parent directory to path to import modules
-sys.path.insert(0, str(Path(__file__).parent.parent / 'python-equalizer'))
-
-from equalizer import SoundEqualizer
+import equalizer as equalizer_module
+from equalizer import DEFAULT_CONFIG, SoundEqualizer, load_json, save_json
 
 
 class TestSoundEqualizer(unittest.TestCase):
     """Test cases for SoundEqualizer class."""
     
-    def setUp(self):
-        """Set up test fixtures."""
-        # Create a temporary config file for testing
-        self.temp_config = {
+    @classmethod
+    def setUpClass(cls):
+        """Set up test fixtures shared by all tests."""
+        # Create a temporary config file for testing; tests only read it
+        cls.temp_config = {
             "sample_rate": 44100,
             "buffer_size": 1024,
             "bands": [
@@ -63,18 +65,19 @@ class TestSoundEqualizer(unittest.TestCase):
         }
         
         # Create temporary file
-        self.temp_file = tempfile.NamedTemporaryFile(
+        cls.temp_file = tempfile.NamedTemporaryFile(
             mode='w',
             suffix='.json',
             delete=False
         )
-        json.dump(self.temp_config, self.temp_file)
-        self.temp_file.close()
+        json.dump(cls.temp_config, cls.temp_file)
+        cls.temp_file.close()
         
-    def tearDown(self):
+    @classmethod
+    def tearDownClass(cls):
         """Clean up test fixtures."""
         # Remove temporary file
-        Path(self.temp_file.name).unlink(missing_ok=True)
+        Path(cls.temp_file.name).unlink(missing_ok=True)
         
     def test_initialization_with_config(self):
         """Test SoundEqualizer initialization with config file."""
@@ -188,6 +191,128 @@ class TestSoundEqualizer(unittest.TestCase):
         # Check that resources are cleaned
         self.assertIsNone(equalizer.stream)
         
+    def test_start_waits_until_stopped(self):
+        """Test that start() sleeps on the stop event and returns once stopped."""
+        fake_stream = mock.MagicMock()
+        fake_stream.is_active.return_value = True
+        fake_pyaudio = mock.MagicMock()
+        fake_pyaudio.PyAudio.return_value.open.return_value = fake_stream
+        
+        equalizer = SoundEqualizer(config_file=self.temp_file.name)
+        
+        # Request a stop from another thread shortly after the stream starts
+        fake_stream.start_stream.side_effect = (
+            lambda: threading.Timer(0.1, equalizer._stop_event.set).start()
+        )
+        
+        with mock.patch.dict(sys.modules, {'pyaudio': fake_pyaudio}):
+            equalizer.start()
+            
+        fake_stream.start_stream.assert_called_once()
+        fake_stream.close.assert_called_once()
+        self.assertIsNone(equalizer.stream)
+        self.assertFalse(equalizer.running)
+        
+    def test_process_buffer_output_level(self):
+        """Test that processed blocks are normalized to -1 dB of int16 full scale."""
+        equalizer = SoundEqualizer(config_file=self.temp_file.name)
+        samples = (np.random.randn(equalizer.buffer_size) * 3000).astype(np.int16)
+        output = np.empty_like(samples)
+        
+        equalizer._process_buffer(samples, output)
+        
+        peak = np.abs(output.astype(np.int32)).max()
+        self.assertAlmostEqual(peak / 32767.0, 10 ** (-1.0 / 20.0), places=3)
+        
+    def test_process_buffer_fixed_point(self):
+        """Test that use_fixed_point routes blocks through the integer cascade."""
+        fixed_config = dict(self.temp_config, use_fixed_point=True, presets={})
+        
+        # The shared config file is read-only, so use a separate one
+        temp_fixed = tempfile.NamedTemporaryFile(
+            mode='w',
+            suffix='.json',
+            delete=False
+        )
+        json.dump(fixed_config, temp_fixed)
+        temp_fixed.close()
+        
+        try:
+            equalizer = SoundEqualizer(config_file=temp_fixed.name)
+            samples = (np.random.randn(equalizer.buffer_size) * 3000).astype(np.int16)
+            output = np.empty_like(samples)
+            
+            with mock.patch.object(equalizer.processor, 'process_block_fixed',
+                                   wraps=equalizer.processor.process_block_fixed) as fixed:
+                equalizer._process_buffer(samples, output)
+                
+            self.assertTrue(equalizer.use_fixed_point)
+            fixed.assert_called_once()
+        finally:
+            Path(temp_fixed.name).unlink(missing_ok=True)
+        
+    def test_start_stops_when_worker_fails(self):
+        """Test that an error on the processing thread ends start()."""
+        fake_stream = mock.MagicMock()
+        fake_stream.is_active.return_value = True
+        fake_pyaudio = mock.MagicMock()
+        fake_pyaudio.PyAudio.return_value.open.return_value = fake_stream
+        
+        equalizer = SoundEqualizer(config_file=self.temp_file.name)
+        # The first call is the warm-up block in start(), the second the worker's
+        equalizer._process_buffer = mock.Mock(side_effect=[None, RuntimeError("boom")])
+        
+        # Feed one block to the worker once the stream is running
+        def feed():
+            equalizer._in_ring.write(equalizer._in.reshape(-1))
+            equalizer._data_ready.set()
+        fake_stream.start_stream.side_effect = feed
+        
+        with mock.patch.dict(sys.modules, {'pyaudio': fake_pyaudio}):
+            equalizer.start()
+            
+        self.assertEqual(equalizer._process_buffer.call_count, 2)
+        fake_stream.close.assert_called_once()
+        self.assertFalse(equalizer.running)
+        
+    def test_start_clears_rings(self):
+        """Test that a restart does not replay audio from the previous run."""
+        fake_stream = mock.MagicMock()
+        fake_pyaudio = mock.MagicMock()
+        fake_pyaudio.PyAudio.return_value.open.return_value = fake_stream
+        
+        equalizer = SoundEqualizer(config_file=self.temp_file.name)
+        equalizer._in_ring.write(equalizer._in.reshape(-1))
+        equalizer._out_ring.write(equalizer._out.reshape(-1))
+        
+        # Check the rings as the stream is opened, then let start() return
+        levels = []
+        fake_stream.start_stream.side_effect = lambda: levels.append(
+            (equalizer._in_ring.available(), equalizer._out_ring.available())
+        )
+        fake_stream.is_active.return_value = False
+        
+        with mock.patch.dict(sys.modules, {'pyaudio': fake_pyaudio}):
+            equalizer.start()
+            
+        self.assertEqual(levels, [(0, 0)])
+        
+    def test_callback_caps_output_backlog(self):
+        """Test that blocks queued by a late worker are dropped, not played late."""
+        equalizer = SoundEqualizer(config_file=self.temp_file.name)
+        block = equalizer.buffer_size
+        
+        # Three blocks queued, oldest first
+        for value in (1, 2, 3):
+            equalizer._out_ring.write(np.full(block, value, dtype=np.int16))
+            
+        in_data = np.zeros(block, dtype=np.int16).tobytes()
+        with mock.patch('equalizer.pyaudio', mock.MagicMock(), create=True):
+            out_data, _ = equalizer.audio_callback(in_data, block, None, 0)
+            
+        np.testing.assert_array_equal(np.frombuffer(out_data, dtype=np.int16), 2)
+        self.assertEqual(equalizer._out_ring.available(), block)
+        
     def test_config_with_missing_fields(self):
         """Test handling config with missing fields."""
         minimal_config = {
@@ -286,6 +411,46 @@ class TestEqualizerConfiguration(unittest.TestCase):
             self.assertEqual(equalizer.buffer_size, 1024)
         finally:
             Path(config_file).unlink(missing_ok=True)
+            
+    def test_load_json_without_orjson(self):
+        """Test that configs parse with the standard json module too."""
+        config = {"sample_rate": 48000, "bands": [{"frequency": 100, "gain_db": 1.5}]}
+        
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
+            json.dump(config, f)
+            config_file = f.name
+            
+        try:
+            with mock.patch.object(equalizer_module, 'orjson', None):
+                self.assertEqual(load_json(config_file), config)
+            self.assertEqual(load_json(config_file), config)
+        finally:
+            Path(config_file).unlink(missing_ok=True)
+            
+    def test_save_json_round_trip(self):
+        """Test that saved files read back the same with or without orjson."""
+        preset = {"description": "Test preset", "gains": [3.0, -2.5, 0.0]}
+        
+        with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as f:
+            preset_file = f.name
+            
+        try:
+            with mock.patch.object(equalizer_module, 'orjson', None):
+                save_json(preset_file, preset)
+                plain = Path(preset_file).read_text()
+            save_json(preset_file, preset)
+            
+            self.assertEqual(Path(preset_file).read_text(), plain)
+            self.assertEqual(load_json(preset_file), preset)
+        finally:
+            Path(preset_file).unlink(missing_ok=True)
+            
+    def test_default_config_is_a_copy(self):
+        """Test that changing a default config does not change DEFAULT_CONFIG."""
+        equalizer = SoundEqualizer(config_file='nonexistent.json')
+        equalizer.config['bands'].append({'frequency': 100, 'gain_db': 0.0})
+        
+        self.assertEqual(DEFAULT_CONFIG['bands'], [])
 
 
 if __name__ == '__main__':
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the filters module.
+
+This module contains tests for the compiled biquad filter kernels.
+"""
+
+import importlib.util
+import unittest
+import numpy as np
+from pathlib import Path
+import sys
+from unittest import mock
+
+from scipy import signal
+
+from audio_processor import EqualizerBand, normalize_audio
+from filters import (
+    INT16_SCALE, cascade_biquad, cascade_biquad_fixed, cascade_biquad_i16_in, cascade_biquad_multi,
+    cascade_response, get_cascade_kernel, normalize_inplace, saturate_to_i16, to_fixed_point
+)
+
+
+def _make_coeffs(bands, sample_rate=44100):
+    """Build an (N, 5) coefficient array from a list of bands."""
+    coeffs = np.zeros((len(bands), 5), dtype=np.float32)
+    for k, band in enumerate(bands):
+        b, a = band.get_filter_coefficients(sample_rate)
+        coeffs[k] = (b[0], b[1], b[2], a[1], a[2])
+    return coeffs
+
+
+class TestCascadeBiquad(unittest.TestCase):
+    """Test cases for cascade_biquad kernel."""
+
+    def test_identity_section(self):
+        """Test that a unity section passes the signal through."""
+        coeffs = np.array([[1.0, 0.0, 0.0, 0.0, 0.0]], dtype=np.float32)
+        z = np.zeros((1, 2), dtype=np.float32)
+        x = np.random.randn(256).astype(np.float32)
+
+        y = cascade_biquad(x, coeffs, z, np.empty_like(x))
+
+        np.testing.assert_array_equal(y, x)
+
+    def test_matches_lfilter(self):
+        """Test that the cascade matches chained scipy lfilter calls."""
+        bands = [
+            EqualizerBand(100, 6.0),
+            EqualizerBand(1000, -4.0),
+            EqualizerBand(8000, 3.0, q_factor=2.0),
+        ]
+        coeffs = _make_coeffs(bands)
+        z = np.zeros((len(bands), 2), dtype=np.float32)
+        x = np.random.randn(2048).astype(np.float32)
+
+        y = cascade_biquad(x, coeffs, z, np.empty_like(x))
+
+        expected = x.astype(np.float64)
+        for band in bands:
+            b, a = band.get_filter_coefficients(44100)
+            expected = signal.lfilter(b, a, expected)
+
+        np.testing.assert_allclose(y, expected, atol=1e-3)
+
+    def test_state_continuity(self):
+        """Test that processing in blocks equals processing in one pass."""
+        bands = [EqualizerBand(500, 6.0), EqualizerBand(5000, -6.0)]
+        coeffs = _make_coeffs(bands)
+        x = np.random.randn(1024).astype(np.float32)
+
+        z_full = np.zeros((2, 2), dtype=np.float32)
+        full = cascade_biquad(x, coeffs, z_full, np.empty_like(x))
+
+        z_split = np.zeros((2, 2), dtype=np.float32)
+        first = cascade_biquad(x[:512], coeffs, z_split, np.empty(512, dtype=np.float32))
+        second = cascade_biquad(x[512:], coeffs, z_split, np.empty(512, dtype=np.float32))
+
+        np.testing.assert_allclose(np.concatenate([first, second]), full, rtol=1e-5, atol=1e-6)
+
+    def test_in_place(self):
+        """Test that filtering in place matches filtering into a new buffer."""
+        coeffs = _make_coeffs([EqualizerBand(1000, 6.0)])
+        x = np.random.randn(512).astype(np.float32)
+
+        expected = cascade_biquad(x, coeffs, np.zeros((1, 2), dtype=np.float32), np.empty_like(x))
+        cascade_biquad(x, coeffs, np.zeros((1, 2), dtype=np.float32), x)
+
+        np.testing.assert_array_equal(x, expected)
+
+
+class TestCascadeBiquadI16In(unittest.TestCase):
+    """Test cases for cascade_biquad_i16_in kernel."""
+
+    def test_matches_scaled_float_input(self):
+        """Test that int16 input is filtered like the same samples scaled to [-1, 1)."""
+        coeffs = _make_coeffs([EqualizerBand(200, 6.0), EqualizerBand(4000, -3.0)])
+        x = (np.random.randn(1024) * 8000).astype(np.int16)
+
+        expected = cascade_biquad((x * INT16_SCALE).astype(np.float32), coeffs,
+                                  np.zeros((2, 2), dtype=np.float32), np.empty(1024, dtype=np.float32))
+        y = cascade_biquad_i16_in(x, coeffs, np.zeros((2, 2), dtype=np.float32),
+                                  np.empty(1024, dtype=np.float32))
+
+        np.testing.assert_allclose(y, expected, rtol=1e-5, atol=1e-6)
+
+
+class TestCascadeBiquadFixed(unittest.TestCase):
+    """Test cases for cascade_biquad_fixed kernel."""
+
+    def test_identity_section(self):
+        """Test that a unity section passes int16 samples through unchanged."""
+        coeffs = to_fixed_point([[1.0, 0.0, 0.0, 0.0, 0.0]])
+        x = np.array([0, 1, -1, 32767, -32768, 1234], dtype=np.int16)
+
+        y = cascade_biquad_fixed(x, coeffs, np.zeros((1, 2), dtype=np.int64), np.empty_like(x))
+
+        np.testing.assert_array_equal(y, x)
+
+    def test_saturates(self):
+        """Test that a boost past full scale saturates instead of wrapping."""
+        coeffs = to_fixed_point([[1.5, 0.0, 0.0, 0.0, 0.0]])
+        x = np.array([30000, -30000], dtype=np.int16)
+
+        y = cascade_biquad_fixed(x, coeffs, np.zeros((1, 2), dtype=np.int64), np.empty_like(x))
+
+        np.testing.assert_array_equal(y, [32767, -32768])
+
+
+class TestGetCascadeKernel(unittest.TestCase):
+    """Test cases for get_cascade_kernel."""
+
+    def test_matches_generic_kernel(self):
+        """Test that the unrolled kernel matches the generic cascade."""
+        bands = [EqualizerBand(f, g) for f, g in [(60, 6.0), (310, -2.0), (3000, 4.0), (12000, 1.0)]]
+        coeffs = _make_coeffs(bands)
+        x = np.random.randn(1024).astype(np.float32)
+
+        z_generic = np.zeros((len(bands), 2), dtype=np.float32)
+        expected = cascade_biquad(x, coeffs, z_generic, np.empty_like(x))
+
+        kernel = get_cascade_kernel(len(bands))
+        z = np.zeros((len(bands), 2), dtype=np.float32)
+        y = kernel(x, coeffs, z, np.empty_like(x))
+
+        np.testing.assert_allclose(y, expected, rtol=1e-5, atol=1e-6)
+        np.testing.assert_allclose(z, z_generic, rtol=1e-5, atol=1e-6)
+
+    def test_kernel_is_cached(self):
+        """Test that kernels are reused per section count."""
+        self.assertIs(get_cascade_kernel(3), get_cascade_kernel(3))
+
+    def test_large_section_count_uses_generic_kernel(self):
+        """Test that very long cascades are not unrolled."""
+        self.assertIs(get_cascade_kernel(64), cascade_biquad)
+        self.assertIs(get_cascade_kernel(64, int16_in=True), cascade_biquad_i16_in)
+
+    def test_int16_input_kernel(self):
+        """Test that the unrolled int16-input kernel matches the generic one."""
+        coeffs = _make_coeffs([EqualizerBand(f, 3.0) for f in (100, 1000, 10000)])
+        x = (np.random.randn(1024) * 8000).astype(np.int16)
+
+        expected = cascade_biquad_i16_in(x, coeffs, np.zeros((3, 2), dtype=np.float32),
+                                         np.empty(1024, dtype=np.float32))
+        kernel = get_cascade_kernel(3, int16_in=True)
+        y = kernel(x, coeffs, np.zeros((3, 2), dtype=np.float32), np.empty(1024, dtype=np.float32))
+
+        self.assertIsNot(kernel, get_cascade_kernel(3))
+        np.testing.assert_allclose(y, expected, atol=1e-4)
+
+
+class TestCascadeBiquadMulti(unittest.TestCase):
+    """Test cases for cascade_biquad_multi kernel."""
+
+    def test_matches_mono_per_channel(self):
+        """Test that each channel is filtered like an independent mono signal."""
+        bands = [EqualizerBand(200, 6.0), EqualizerBand(4000, -3.0)]
+        coeffs = _make_coeffs(bands)
+        x = np.random.randn(1024, 4).astype(np.float32)
+
+        z = np.zeros((len(bands), 2, 4), dtype=np.float32)
+        y = cascade_biquad_multi(x, coeffs, z, np.empty_like(x))
+
+        for c in range(4):
+            z_mono = np.zeros((len(bands), 2), dtype=np.float32)
+            expected = cascade_biquad(np.ascontiguousarray(x[:, c]), coeffs, z_mono,
+                                      np.empty(1024, dtype=np.float32))
+            np.testing.assert_allclose(y[:, c], expected, rtol=1e-5, atol=1e-6)
+
+
+class TestCascadeResponse(unittest.TestCase):
+    """Test cases for cascade_response kernel."""
+
+    def test_matches_sosfreqz(self):
+        """Test that the response matches scipy's sosfreqz."""
+        bands = [EqualizerBand(100, 6.0), EqualizerBand(1000, -4.0, q_factor=2.0)]
+        sos = np.array([b + a for b, a in (band.get_filter_coefficients(44100) for band in bands)])
+        w = np.linspace(0.01, 3.1, 64)
+        z = np.exp(-1j * w)
+        mag_db = np.empty(64)
+        phase = np.empty(64)
+
+        cascade_response(sos, z, z * z, mag_db, phase)
+
+        _, h = signal.sosfreqz(sos, worN=w)
+        np.testing.assert_allclose(mag_db, 20 * np.log10(np.abs(h)), atol=1e-9)
+        np.testing.assert_allclose(phase, np.angle(h), atol=1e-9)
+
+
+class TestNormalizeInplace(unittest.TestCase):
+    """Test cases for normalize_inplace kernel."""
+
+    def test_matches_normalize_audio(self):
+        """Test that in-place normalization matches normalize_audio."""
+        x = np.random.randn(1024).astype(np.float32)
+        expected = normalize_audio(x, target_level=-1.0)
+
+        normalize_inplace(x, 10 ** (-1.0 / 20.0))
+
+        np.testing.assert_allclose(x, expected, rtol=1e-5)
+
+    def test_zero_signal_unchanged(self):
+        """Test that a silent buffer is left untouched."""
+        x = np.zeros(256, dtype=np.float32)
+
+        normalize_inplace(x, 0.5)
+
+        np.testing.assert_array_equal(x, 0.0)
+
+
+class TestSaturateToI16(unittest.TestCase):
+    """Test cases for saturate_to_i16 kernel."""
+
+    def test_matches_clip_and_cast(self):
+        """Test that the fused kernel matches np.clip followed by astype."""
+        x = (np.random.randn(1024) * 20000).astype(np.float32)
+        out = np.empty(1024, dtype=np.int16)
+
+        saturate_to_i16(x, out)
+
+        np.testing.assert_array_equal(out, np.clip(x, -32768, 32767).astype(np.int16))
+
+    def test_saturates_extremes(self):
+        """Test that out-of-range samples saturate instead of wrapping."""
+        x = np.array([1e6, -1e6, 32767.0, -32768.0], dtype=np.float32)
+        out = np.empty(4, dtype=np.int16)
+
+        saturate_to_i16(x, out)
+
+        np.testing.assert_array_equal(out, [32767, -32768, 32767, -32768])
+
+    def test_scale(self):
+        """Test that samples are scaled to int16 units before clamping."""
+        x = np.array([0.5, -0.5, 2.0], dtype=np.float32)
+        out = np.empty(3, dtype=np.int16)
+
+        saturate_to_i16(x, out, 32767.0)
+
+        np.testing.assert_array_equal(out, [16383, -16383, 32767])
+
+
+class TestNumpyFallback(unittest.TestCase):
+    """Test cases for the kernels used when Numba is not installed."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Import a copy of the filters module with Numba hidden."""
+        path = Path(__file__).parent.parent / 'python-equalizer' / 'filters.py'
+        spec = importlib.util.spec_from_file_location('filters_no_numba', path)
+        cls.filters = importlib.util.module_from_spec(spec)
+        with mock.patch.dict(sys.modules, {'numba': None}):
+            spec.loader.exec_module(cls.filters)
+
+    def test_numba_unavailable(self):
+        """Test that the copy really runs without Numba."""
+        self.assertFalse(self.filters.HAVE_NUMBA)
+
+    def test_normalize_inplace(self):
+        """Test that the numpy fallback matches the compiled kernel."""
+        x = np.random.randn(1024).astype(np.float32)
+        expected = normalize_inplace(x.copy(), 0.5)
+
+        result = self.filters.normalize_inplace(x, 0.5)
+
+        self.assertIs(result, x)
+        np.testing.assert_allclose(x, expected, rtol=1e-6)
+
+    def test_saturate_to_i16(self):
+        """Test that the numpy fallback matches the compiled kernel."""
+        x = np.array([1e6, -1e6, 1.5, -2.5, 32767.0], dtype=np.float32)
+        expected = saturate_to_i16(x.copy(), np.empty(5, dtype=np.int16))
+
+        out = self.filters.saturate_to_i16(x, np.empty(5, dtype=np.int16))
+
+        np.testing.assert_array_equal(out, expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,28 +5,83 @@ Unit tests for the equalizer GUI module.
 Tests the GUI components and functionality.
 """
 
+# Set the Qt platform to offscreen before anything can load Qt
+import os
+os.environ['QT_QPA_PLATFORM'] = 'offscreen'
+
+import io
 import unittest
 import json
-import tempfile
-from pathlib import Path
 import sys
 
-# Add parent directory to path to import modules
-sys.path.insert(0, str(Path(__file__).parent.parent / 'python-equalizer'))
-
-# Import Qt and set platform to offscreen for testing
-import os
-os.environ['QT_QPA_PLATFORM'] = 'offscreen'
-
+import numpy as np
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg
 from PyQt5.QtWidgets import QApplication
 from PyQt5.QtCore import Qt
 from PyQt5.QtTest import QTest
 
-from equalizer_gui import EqualizerGUI, EqualizerBandControl, FrequencyVisualization
+from equalizer_gui import VIZ_N_POINTS, _load_config, EqualizerGUI, EqualizerBandControl, FrequencyVisualization
+
+
+# QApplication shared by all tests, created when the tests start running
+# rather than when the module is collected
+app = None
+
+# Rendering the canvas is kept for the tests that check it; the others
+# only look at the line data
+_real_draw = FigureCanvasQTAgg.draw
+
+
+def setUpModule():
+    """Create the QApplication and skip canvas rendering while the tests run."""
+    global app
+    app = QApplication.instance() or QApplication(sys.argv)
+    FigureCanvasQTAgg.draw = lambda self: None
+    
+    
+def tearDownModule():
+    """Restore canvas rendering."""
+    FigureCanvasQTAgg.draw = _real_draw
+
+
+def wait_for_visualization(gui):
+    """Wait until pending response computations have reached the plot."""
+    QTest.qWait(1)
+    gui._viz_pool.waitForDone()
+    QTest.qWait(10)
 
 
-# Create QApplication instance once for all tests
-app = QApplication(sys.argv)
+# Frequency grid and flat response shared by the plot tests; read-only
+# since the plot may keep a reference to them
+_FREQS = np.logspace(1, 4, 100)
+_FREQS.flags.writeable = False
+_ZEROS = np.zeros_like(_FREQS)
+_ZEROS.flags.writeable = False
+
+# FrequencyVisualization widgets handed back by finished tests; building a
+# Figure and canvas is the costly part of these tests
+_VIZ_POOL = []
+
+
+def acquire_viz():
+    """Return a pooled FrequencyVisualization, or a new one."""
+    return _VIZ_POOL.pop() if _VIZ_POOL else FrequencyVisualization()
+
+
+def release_viz(viz):
+    """Clear a FrequencyVisualization and return it to the pool."""
+    viz.line.set_data([], [])
+    viz._frequencies = None
+    _VIZ_POOL.append(viz)
+
+
+def reset_gui(gui):
+    """Return a shared window to its freshly constructed state."""
+    gui._set_enabled(False)
+    gui.preset_combo.setCurrentIndex(0)
+    gui._preset_debounce.stop()
+    gui._reset_all_bands()
+    wait_for_visualization(gui)
 
 
 class TestFrequencyVisualization(unittest.TestCase):
@@ -34,28 +89,85 @@ class TestFrequencyVisualization(unittest.TestCase):
     
     def test_initialization(self):
         """Test FrequencyVisualization initialization."""
-        viz = FrequencyVisualization()
+        viz = acquire_viz()
+        self.addCleanup(release_viz, viz)
         
         self.assertIsNotNone(viz.figure)
         self.assertIsNotNone(viz.axes)
         self.assertIsNotNone(viz.line)
         
+    def test_interaction_disabled(self):
+        """Test that the read-only plot does not track the mouse."""
+        viz = acquire_viz()
+        self.addCleanup(release_viz, viz)
+        
+        self.assertFalse(viz.hasMouseTracking())
+        self.assertFalse(viz.axes.get_navigate())
+        
     def test_update_plot(self):
         """Test updating the plot with data."""
         import numpy as np
         
-        viz = FrequencyVisualization()
-        
-        freqs = np.logspace(1, 4, 100)
-        mag_db = np.zeros_like(freqs)
+        viz = acquire_viz()
+        self.addCleanup(release_viz, viz)
         
-        # Should not raise an error
-        viz.update_plot(freqs, mag_db)
+        # Should not raise an error; the line data is all that is checked
+        viz.update_plot(_FREQS, _ZEROS, redraw=False)
         
         # Check that line data was updated
         x_data, y_data = viz.line.get_data()
-        self.assertEqual(len(x_data), len(freqs))
-        self.assertEqual(len(y_data), len(mag_db))
+        self.assertEqual(len(x_data), len(_FREQS))
+        self.assertEqual(len(y_data), len(_ZEROS))
+
+
+    def test_update_plot_same_frequencies(self):
+        """Test that repeated updates on one grid only replace the y data."""
+        import numpy as np
+        
+        viz = acquire_viz()
+        self.addCleanup(release_viz, viz)
+        
+        viz.update_plot(_FREQS, _ZEROS)
+        viz.update_plot(_FREQS, np.ones_like(_FREQS))
+        
+        x_data, y_data = viz.line.get_data()
+        np.testing.assert_array_equal(x_data, _FREQS)
+        np.testing.assert_array_equal(y_data, 1.0)
+
+        
+    def test_update_plot_blits_after_draw(self):
+        """Test that updates after a full draw only blit the line."""
+        import numpy as np
+        from unittest import mock
+        
+        viz = acquire_viz()
+        self.addCleanup(release_viz, viz)
+        _real_draw(viz)
+        self.assertIsNotNone(viz._background)
+        
+        with mock.patch.object(viz, 'blit') as blit, \
+                mock.patch.object(viz, 'draw_idle') as draw_idle:
+            viz.update_plot(_FREQS, np.ones_like(_FREQS))
+            
+        blit.assert_called_once_with(viz.axes.bbox)
+        draw_idle.assert_not_called()
+        np.testing.assert_array_equal(viz.line.get_ydata(), 1.0)
+        
+    def test_update_plot_without_redraw(self):
+        """Test that redraw=False only replaces the line data."""
+        from unittest import mock
+        
+        viz = acquire_viz()
+        self.addCleanup(release_viz, viz)
+        _real_draw(viz)
+        
+        with mock.patch.object(viz, 'blit') as blit, \
+                mock.patch.object(viz, 'draw_idle') as draw_idle:
+            viz.update_plot(_FREQS, np.ones_like(_FREQS), redraw=False)
+            
+        blit.assert_not_called()
+        draw_idle.assert_not_called()
+        np.testing.assert_array_equal(viz.line.get_ydata(), 1.0)
 
 
 class TestEqualizerBandControl(unittest.TestCase):
@@ -79,6 +191,16 @@ class TestEqualizerBandControl(unittest.TestCase):
         control.set_gain(-3.5)
         self.assertEqual(control.get_gain(), -3.5)
         
+    def test_set_gain_emits_value_changed(self):
+        """Test that setting the gain programmatically notifies listeners."""
+        control = EqualizerBandControl(3, 600.0, "Midrange")
+        received = []
+        control.value_changed.connect(lambda index, gain: received.append((index, gain)))
+        
+        control.set_gain(2.5)
+        
+        self.assertEqual(received, [(3, 2.5)])
+        
     def test_slider_range(self):
         """Test slider range limits."""
         control = EqualizerBandControl(0, 100.0, "Bass")
@@ -98,18 +220,37 @@ class TestEqualizerBandControl(unittest.TestCase):
         control.set_gain(6.5)
         self.assertIn("6.5", control.value_label.text())
         self.assertIn("dB", control.value_label.text())
+        
+    def test_value_label_follows_slider_once_per_turn(self):
+        """Test that dragging the slider defers the label to the event loop."""
+        control = EqualizerBandControl(0, 100.0, "Bass")
+        
+        for value in (10, 20, 25):
+            control.slider.setValue(value)
+        self.assertEqual(control.value_label.text(), "0.0 dB")
+        
+        QTest.qWait(10)
+        self.assertEqual(control.value_label.text(), "+2.5 dB")
 
 
 class TestEqualizerGUI(unittest.TestCase):
     """Test cases for EqualizerGUI main window."""
     
+    @classmethod
+    def setUpClass(cls):
+        """Build one window for all tests in the class."""
+        cls.gui = EqualizerGUI()
+        combo = cls.gui.preset_combo
+        cls.preset_index = {combo.itemData(i): i for i in range(combo.count())}
+        
+    @classmethod
+    def tearDownClass(cls):
+        """Close the shared window."""
+        cls.gui.close()
+        
     def setUp(self):
         """Set up test fixtures."""
-        self.gui = EqualizerGUI()
-        
-    def tearDown(self):
-        """Clean up test fixtures."""
-        self.gui.close()
+        reset_gui(self.gui)
         
     def test_initialization(self):
         """Test GUI initialization."""
@@ -117,6 +258,10 @@ class TestEqualizerGUI(unittest.TestCase):
         self.assertIsNotNone(self.gui.config)
         self.assertFalse(self.gui.enabled)
         
+    def test_config_loaded_once(self):
+        """Test that windows share one parsed configuration."""
+        self.assertIs(self.gui.config, _load_config())
+        
     def test_band_controls_created(self):
         """Test that all band controls are created."""
         expected_bands = len(self.gui.config['bands'])
@@ -138,74 +283,100 @@ class TestEqualizerGUI(unittest.TestCase):
         self.gui._reset_all_bands()
         
         # Check all bands are at 0
-        for control in self.gui.band_controls:
-            self.assertEqual(control.get_gain(), 0.0)
+        gains = [control.get_gain() for control in self.gui.band_controls]
+        np.testing.assert_array_equal(gains, 0.0)
             
+    def test_set_gains(self):
+        """Test setting and reading all band gains at once."""
+        gains = np.arange(len(self.gui.band_controls)) - 4.5
+        
+        self.gui.set_gains(gains)
+        
+        result = self.gui.get_gains()
+        np.testing.assert_array_equal(result, gains)
+        for control, gain in zip(self.gui.band_controls, result):
+            self.assertEqual(control.get_gain(), gain)
+            
+        # The result is a copy, not the window's own array
+        result[0] = 99.0
+        self.assertNotEqual(self.gui.get_gains()[0], 99.0)
+        
+    def test_batch_update_applies_once(self):
+        """Test that a batch of gain changes updates the equalizer once."""
+        from unittest import mock
+        
+        self.gui._set_enabled(True)
+        with mock.patch.object(self.gui, '_apply_current_settings') as apply, \
+                mock.patch.object(self.gui, '_update_visualization') as update:
+            with self.gui._batch_update():
+                for control in self.gui.band_controls:
+                    control.set_gain(1.5)
+                    
+        apply.assert_called_once_with()
+        update.assert_called_once_with()
+        np.testing.assert_array_equal(self.gui._gains_db, 1.5)
+        
     def test_apply_preset(self):
         """Test applying a preset."""
         # Select the bass_boost preset
-        preset_index = None
-        for i in range(self.gui.preset_combo.count()):
-            if self.gui.preset_combo.itemData(i) == 'bass_boost':
-                preset_index = i
-                break
-                
-        self.assertIsNotNone(preset_index)
+        self.assertIn('bass_boost', self.preset_index)
         
-        # Apply preset
-        self.gui.preset_combo.setCurrentIndex(preset_index)
+        # Apply preset; it takes effect once the debounce interval passes
+        self.gui.preset_combo.setCurrentIndex(self.preset_index['bass_boost'])
+        QTest.qWait(150)
         
         # Check that first band has positive gain (bass boost)
         first_band_gain = self.gui.band_controls[0].get_gain()
         self.assertGreater(first_band_gain, 0)
         
+    def test_preset_changes_are_debounced(self):
+        """Test that only the last of several quick preset changes applies."""
+        combo = self.gui.preset_combo
+        for name in ('bass_boost', 'treble_boost'):
+            combo.setCurrentIndex(self.preset_index[name])
+            
+        # Nothing is applied while the selection is still changing
+        self.assertTrue(self.gui._preset_debounce.isActive())
+        self.assertEqual(self.gui.band_controls[-1].get_gain(), 0.0)
+        
+        QTest.qWait(150)
+        
+        expected = self.gui.config['presets']['treble_boost']['gains']
+        gains = [control.get_gain() for control in self.gui.band_controls]
+        np.testing.assert_allclose(gains, expected, atol=0.05)
+            
     def test_save_load_custom_preset(self):
         """Test saving and loading a custom preset."""
         # Set some custom gains
         test_gains = [3.0, -2.0, 1.5, 0.0, -1.0, 2.5, 0.5, -0.5, 1.0, -1.5]
-        for i, gain in enumerate(test_gains):
-            if i < len(self.gui.band_controls):
-                self.gui.band_controls[i].set_gain(gain)
-                
-        # Create temporary file for preset
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
-            preset_file = f.name
-            
-        try:
-            # Collect current gains
-            gains = [control.get_gain() for control in self.gui.band_controls]
-            
-            # Create preset data
-            preset_data = {
-                "description": "Test preset",
-                "gains": gains,
-                "bands": self.gui.config['bands']
-            }
-            
-            # Save
-            with open(preset_file, 'w') as f:
-                json.dump(preset_data, f, indent=2)
-                
-            # Reset bands
-            self.gui._reset_all_bands()
-            
-            # Load the preset
-            with open(preset_file, 'r') as f:
-                loaded_preset = json.load(f)
-                
-            # Apply loaded gains
-            for i, gain in enumerate(loaded_preset['gains']):
-                self.gui.band_controls[i].set_gain(gain)
-                
-            # Verify gains match
-            for i, expected_gain in enumerate(test_gains):
-                if i < len(self.gui.band_controls):
-                    actual_gain = self.gui.band_controls[i].get_gain()
-                    self.assertAlmostEqual(actual_gain, expected_gain, places=1)
-                    
-        finally:
-            # Clean up
-            Path(preset_file).unlink(missing_ok=True)
+        self.gui.set_gains(test_gains)
+        
+        # Collect current gains
+        gains = self.gui.get_gains()
+        
+        # Create preset data
+        preset_data = {
+            "description": "Test preset",
+            "gains": gains.tolist(),
+            "bands": self.gui.config['bands']
+        }
+        
+        # Save to an in-memory buffer
+        buffer = io.StringIO()
+        json.dump(preset_data, buffer)
+        
+        # Reset bands
+        self.gui._reset_all_bands()
+        
+        # Load the preset
+        buffer.seek(0)
+        loaded_preset = json.load(buffer)
+        
+        # Apply loaded gains
+        self.gui.set_gains(loaded_preset['gains'])
+        
+        # Verify gains match
+        np.testing.assert_allclose(self.gui.get_gains(), test_gains, atol=0.05)
             
     def test_enable_disable(self):
         """Test enable/disable functionality."""
@@ -213,10 +384,20 @@ class TestEqualizerGUI(unittest.TestCase):
         self.assertFalse(self.gui.enabled)
         
         # Enable
-        self.gui.enable_checkbox.setChecked(True)
+        self.gui._set_enabled(True)
         self.assertTrue(self.gui.enabled)
+        self.assertTrue(self.gui.enable_checkbox.isChecked())
         
         # Disable
+        self.gui._set_enabled(False)
+        self.assertFalse(self.gui.enabled)
+        self.assertFalse(self.gui.enable_checkbox.isChecked())
+        
+    def test_enable_checkbox(self):
+        """Test that the checkbox enables and disables the equalizer."""
+        self.gui.enable_checkbox.setChecked(True)
+        self.assertTrue(self.gui.enabled)
+        
         self.gui.enable_checkbox.setChecked(False)
         self.assertFalse(self.gui.enabled)
         
@@ -227,66 +408,162 @@ class TestEqualizerGUI(unittest.TestCase):
         self.gui.band_controls[5].set_gain(-3.0)
         
         # Update visualization (should not raise error)
-        self.gui._update_visualization()
+        self.gui._do_update_visualization()
+        wait_for_visualization(self.gui)
         
         # Check that plot has data
         x_data, y_data = self.gui.freq_viz.line.get_data()
         self.assertGreater(len(x_data), 0)
         self.assertGreater(len(y_data), 0)
+        
+    def test_visualization_reuses_processor(self):
+        """Test that visualization retunes one cached processor."""
+        processor = self.gui._viz_processor
+        bands = list(processor.bands)
+        
+        self.gui.band_controls[2].set_gain(4.5)
+        self.gui._do_update_visualization()
+        wait_for_visualization(self.gui)
+        
+        self.assertIs(self.gui._viz_processor, processor)
+        self.assertEqual(processor.bands, bands)
+        self.assertEqual(processor.bands[2].gain_db, 4.5)
+        
+    def test_gains_array_tracks_controls(self):
+        """Test that the gains array follows slider and preset changes."""
+        self.gui.band_controls[4].set_gain(-2.5)
+        self.assertEqual(self.gui._gains_db[4], -2.5)
+        
+        self.gui.band_controls[4].slider.setValue(35)
+        self.assertEqual(self.gui._gains_db[4], 3.5)
+        
+        self.gui._reset_all_bands()
+        np.testing.assert_array_equal(self.gui._gains_db, 0.0)
+        
+    def test_visualization_uses_cached_grid(self):
+        """Test that the plotted frequency grid is built once."""
+        freqs = self.gui._viz_freqs
+        self.gui._do_update_visualization()
+        wait_for_visualization(self.gui)
+        
+        self.assertIs(self.gui._viz_freqs, freqs)
+        self.assertIs(self.gui.freq_viz._frequencies, freqs)
+        self.assertEqual(len(freqs), VIZ_N_POINTS)
+        self.assertAlmostEqual(freqs[0], 20.0)
+        self.assertAlmostEqual(freqs[-1], 20000.0)
+        
+    def test_apply_settings_retunes_bands_in_place(self):
+        """Test that applying settings keeps the equalizer's band objects."""
+        self.gui._apply_current_settings()
+        bands = list(self.gui.equalizer.processor.bands)
+        
+        self.gui.band_controls[0].set_gain(-6.0)
+        self.gui._apply_current_settings()
+        
+        self.assertEqual(self.gui.equalizer.processor.bands, bands)
+        self.assertEqual(bands[0].gain_db, -6.0)
+        
+    def test_visualization_updates_are_coalesced(self):
+        """Test that repeated update requests are deferred and merged."""
+        _, initial_y = self.gui.freq_viz.line.get_data()
+        initial_y = initial_y.copy()
+        
+        for gain in (2.0, 4.0, 6.0):
+            self.gui.band_controls[0].set_gain(gain)
+            self.gui._update_visualization()
+            
+        # Nothing is recomputed until the event loop runs
+        self.assertTrue(self.gui._viz_pending.isActive())
+        _, pending_y = self.gui.freq_viz.line.get_data()
+        np.testing.assert_array_equal(pending_y, initial_y)
+        
+        wait_for_visualization(self.gui)
+        
+        self.assertFalse(self.gui._viz_pending.isActive())
+        _, updated_y = self.gui.freq_viz.line.get_data()
+        self.assertFalse(np.array_equal(updated_y, initial_y))
+        
+    def test_unchanged_gains_skip_visualization(self):
+        """Test that an update with unchanged gains does no work."""
+        seqno = self.gui._viz_seqno
+        
+        self.gui._do_update_visualization()
+        self.assertEqual(self.gui._viz_seqno, seqno)
+        
+        self.gui.band_controls[1].set_gain(3.0)
+        self.gui._do_update_visualization()
+        self.assertEqual(self.gui._viz_seqno, seqno + 1)
+        
+    def test_stale_visualization_result_dropped(self):
+        """Test that a response older than the latest request is ignored."""
+        _, initial_y = self.gui.freq_viz.line.get_data()
+        initial_y = initial_y.copy()
+        
+        stale = np.full(len(self.gui._viz_freqs), 9.0)
+        self.gui._on_viz_done(self.gui._viz_seqno - 1, stale)
+        
+        _, y_data = self.gui.freq_viz.line.get_data()
+        np.testing.assert_array_equal(y_data, initial_y)
 
 
 class TestGUIIntegration(unittest.TestCase):
     """Integration tests for GUI components."""
     
+    @classmethod
+    def setUpClass(cls):
+        """Build one window for all tests in the class."""
+        cls.gui = EqualizerGUI()
+        combo = cls.gui.preset_combo
+        cls.preset_index = {combo.itemData(i): i for i in range(combo.count())}
+        
+    @classmethod
+    def tearDownClass(cls):
+        """Close the shared window."""
+        cls.gui.close()
+        
+    def setUp(self):
+        """Set up test fixtures."""
+        reset_gui(self.gui)
+        
     def test_band_change_updates_visualization(self):
         """Test that changing a band updates the visualization."""
-        gui = EqualizerGUI()
+        gui = self.gui
+        
+        # Get initial visualization data
+        initial_x, initial_y = gui.freq_viz.line.get_data()
+        initial_y = initial_y.copy()
+        
+        # Change a band
+        gui.band_controls[0].set_gain(8.0)
+        
+        # Trigger visualization update
+        gui._do_update_visualization()
+        wait_for_visualization(gui)
+        
+        # Get updated visualization data
+        updated_x, updated_y = gui.freq_viz.line.get_data()
+        
+        # Data should have changed
+        self.assertTrue(np.any(initial_y != updated_y))
         
-        try:
-            # Get initial visualization data
-            initial_x, initial_y = gui.freq_viz.line.get_data()
-            
-            # Change a band
-            gui.band_controls[0].set_gain(8.0)
-            
-            # Trigger visualization update
-            gui._update_visualization()
-            
-            # Get updated visualization data
-            updated_x, updated_y = gui.freq_viz.line.get_data()
-            
-            # Data should have changed
-            self.assertFalse(all(initial_y == updated_y))
-            
-        finally:
-            gui.close()
-            
     def test_preset_changes_all_bands(self):
         """Test that applying preset changes all bands."""
-        gui = EqualizerGUI()
-        
-        try:
-            # Apply flat preset first
-            for i in range(gui.preset_combo.count()):
-                if gui.preset_combo.itemData(i) == 'flat':
-                    gui.preset_combo.setCurrentIndex(i)
-                    break
-                    
-            # All bands should be at 0
-            for control in gui.band_controls:
-                self.assertEqual(control.get_gain(), 0.0)
+        gui = self.gui
+        
+        # Apply flat preset first
+        gui.preset_combo.setCurrentIndex(self.preset_index['flat'])
+        QTest.qWait(150)
                 
-            # Apply bass_boost preset
-            for i in range(gui.preset_combo.count()):
-                if gui.preset_combo.itemData(i) == 'bass_boost':
-                    gui.preset_combo.setCurrentIndex(i)
-                    break
-                    
-            # First bands should have positive gain
-            self.assertGreater(gui.band_controls[0].get_gain(), 0.0)
+        # All bands should be at 0
+        gains = [control.get_gain() for control in gui.band_controls]
+        np.testing.assert_array_equal(gains, 0.0)
             
-        finally:
-            gui.close()
+        # Apply bass_boost preset
+        gui.preset_combo.setCurrentIndex(self.preset_index['bass_boost'])
+        QTest.qWait(150)
+                
+        # First bands should have positive gain
+        self.assertGreater(gui.band_controls[0].get_gain(), 0.0)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the ring_buffer module.
+
+This module contains tests for the RingBuffer class.
+"""
+
+import unittest
+import numpy as np
+
+from ring_buffer import RingBuffer
+
+
+class TestRingBuffer(unittest.TestCase):
+    """Test cases for RingBuffer class."""
+
+    def test_capacity_rounded_to_power_of_two(self):
+        """Test that capacity is rounded up to a power of two."""
+        ring = RingBuffer(1000)
+
+        self.assertEqual(ring.capacity, 1024)
+        self.assertEqual(ring.available(), 0)
+        self.assertEqual(ring.space(), 1024)
+
+    def test_write_then_read(self):
+        """Test that samples come out in the order they went in."""
+        ring = RingBuffer(16)
+        data = np.arange(10, dtype=np.int16)
+
+        self.assertTrue(ring.write(data))
+        self.assertEqual(ring.available(), 10)
+
+        out = np.empty(10, dtype=np.int16)
+        self.assertTrue(ring.read(out))
+        np.testing.assert_array_equal(out, data)
+        self.assertEqual(ring.available(), 0)
+
+    def test_wraparound(self):
+        """Test reads and writes that cross the end of the storage."""
+        ring = RingBuffer(16)
+        out = np.empty(12, dtype=np.int16)
+
+        ring.write(np.arange(12, dtype=np.int16))
+        ring.read(out)
+
+        data = np.arange(100, 112, dtype=np.int16)
+        self.assertTrue(ring.write(data))
+        self.assertTrue(ring.read(out))
+        np.testing.assert_array_equal(out, data)
+
+    def test_overflow_rejected(self):
+        """Test that a write larger than the free space is rejected."""
+        ring = RingBuffer(16)
+
+        self.assertTrue(ring.write(np.zeros(12, dtype=np.int16)))
+        self.assertFalse(ring.write(np.zeros(8, dtype=np.int16)))
+        self.assertEqual(ring.available(), 12)
+
+    def test_underflow_rejected(self):
+        """Test that a read larger than the stored data is rejected."""
+        ring = RingBuffer(16)
+        ring.write(np.ones(4, dtype=np.int16))
+
+        out = np.zeros(8, dtype=np.int16)
+        self.assertFalse(ring.read(out))
+        np.testing.assert_array_equal(out, 0)
+        self.assertEqual(ring.available(), 4)
+
+    def test_discard_drops_oldest(self):
+        """Test that discard skips the oldest samples."""
+        ring = RingBuffer(16)
+        ring.write(np.arange(10, dtype=np.int16))
+        
+        ring.discard(6)
+        
+        out = np.empty(4, dtype=np.int16)
+        self.assertTrue(ring.read(out))
+        np.testing.assert_array_equal(out, [6, 7, 8, 9])
+        
+        ring.discard(100)
+        self.assertEqual(ring.available(), 0)
+        
+    def test_clear(self):
+        """Test that clear empties the buffer."""
+        ring = RingBuffer(16)
+        ring.write(np.ones(10, dtype=np.int16))
+        
+        ring.clear()
+        
+        self.assertEqual(ring.available(), 0)
+        self.assertEqual(ring.space(), 16)
+
+
+if __name__ == '__main__':
+    unittest.main()